@@ -1,3 +1,9 @@
+import argparse
+import io
+import os
+import struct
+import sys
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 
@@ -9,10 +15,126 @@ ECC_POS21 = ([2, 4, 6, 8, 10, 12, 14, 16, 18, 20], [2, 5, 6, 9, 10, 13, 14, 17,
              [4, 5, 6, 12, 13, 14, 19, 20], [8, 9, 10, 11, 12, 13, 14], [16, 17, 18, 19, 20])
 POSITION21 = (0, 1, 3, 7, 15)
 
+# Те же позиции в виде масок для целочисленного кода: бит строки с индексом i —
+# бит (15 - i) 16-битного слова или бит (20 - i) 21-битного кода. Маска проверки
+# включает и сам контрольный бит, поэтому бит синдрома — четность единиц под маской
+ECC_MASKS16 = tuple(sum(1 << (15 - x) for x in group) for group in ECC_POS)
+CHECK_MASKS21 = tuple(sum(1 << (20 - x) for x in group) | 1 << (20 - parity)
+                      for group, parity in zip(ECC_POS21, POSITION21))
+PARITY_BITS21 = tuple(1 << (20 - x) for x in POSITION21)
+# Поля информационных бит: (маска в 16-битном слове, сдвиг влево в 21-битном коде)
+DATA_FIELDS21 = ((0x8000, 3), (0x7000, 2), (0x0FE0, 1), (0x001F, 0))
+# Маски проверки потокового кодека — те же группы ECC_POS, что и у кодера,
+# переложенные на позиции 21-битного кода. С ними синдром — номер (с единицы)
+# ошибочного бита, как в классическом коде Хэмминга. В таблице ECC_POS21 текстового
+# режима в группе 2 нет позиции 11; она оставлена как есть ради совместимости
+DATA_POS21 = tuple(i for i in range(21) if i not in POSITION21)
+SYNDROME_MASKS21 = tuple(sum(1 << (20 - DATA_POS21[x]) for x in group) | 1 << (20 - parity)
+                         for group, parity in zip(ECC_POS, POSITION21))
+
 
 def is_bool(variable):
-    new_bool = [x for x in variable if x in ["0", "1"]]
-    return len(variable) == len(new_bool)
+    return not variable.strip("01")  # После удаления '0' и '1' с краев остается первый чужой символ
+
+
+def hamming_encode_word(word):
+    # 16-битное слово -> 21-битный код: информационные биты раздвигаются
+    # по полям, контрольные — четность слова под масками ECC_POS
+    codeword = 0
+    for mask, shift in DATA_FIELDS21:
+        codeword |= (word & mask) << shift
+    for mask, parity in zip(ECC_MASKS16, PARITY_BITS21):
+        if (word & mask).bit_count() & 1:
+            codeword |= parity
+    return codeword
+
+
+def hamming_syndrome(codeword, masks=CHECK_MASKS21):
+    # Бит i синдрома — несовпадение контрольного бита i с пересчитанной четностью
+    syndrome = 0
+    for i, mask in enumerate(masks):
+        syndrome |= ((codeword & mask).bit_count() & 1) << i
+    return syndrome
+
+
+def hamming_data_bits(codeword):
+    # Информационные биты 21-битного кода -> 16-битное слово
+    word = 0
+    for mask, shift in DATA_FIELDS21:
+        word |= (codeword >> shift) & mask
+    return word
+
+
+def hamming_decode_word(codeword):
+    # 21-битный код -> (16-битное слово, синдром). Если расходится один
+    # контрольный бит, он исправляется одним XOR; при нескольких — не исправляется
+    syndrome = hamming_syndrome(codeword)
+    if syndrome and not syndrome & (syndrome - 1):
+        codeword ^= 1 << (21 - syndrome)  # Бит с номером syndrome (с единицы)
+    return hamming_data_bits(codeword), syndrome
+
+
+def hamming_correct_word(codeword):
+    # Декодирование потокового кодека: синдром от 1 до 21 — номер ошибочного
+    # бита, он исправляется одним XOR; больший синдром — ошибка не исправляется
+    syndrome = hamming_syndrome(codeword, SYNDROME_MASKS21)
+    if 0 < syndrome <= 21:
+        codeword ^= 1 << (21 - syndrome)
+    return hamming_data_bits(codeword), syndrome
+
+
+def syndrome_report(syndrome):
+    # Текст отчета об ошибке по синдрому
+    if not syndrome:
+        return ""
+    if not syndrome & (syndrome - 1):
+        return f"Исправлена одиночная ошибка в бите {syndrome}\n"
+    err_list = [i for i in range(len(POSITION21)) if syndrome >> i & 1]
+    return f"Обнаружена двойная ошибка (биты {err_list}), не исправляется\n"
+
+
+def stream_syndrome_report(syndrome):
+    # Текст отчета потокового кодека
+    if syndrome <= 21:
+        return f"Исправлена одиночная ошибка в бите {syndrome}\n"
+    return f"Обнаружена неисправимая ошибка (синдром {syndrome}), блок не исправлен\n"
+
+
+# Таблицы вместо подсчета четности. Код линеен: код слова — XOR кодов его
+# старшего и младшего байтов, а синдром и информационные биты — XOR значений
+# на трех частях кода (биты 20-13, 12-5 и 4-0)
+ENCODE_HIGH = tuple(hamming_encode_word(byte << 8) for byte in range(256))
+ENCODE_LOW = tuple(hamming_encode_word(byte) for byte in range(256))
+CODE_PARTS21 = ((13, 256), (5, 256), (0, 32))  # (сдвиг части, число ее значений)
+
+
+def part_tables(function):
+    # Значения линейной функции кода на всех значениях каждой из трех частей
+    return tuple(tuple(function(value << shift) for value in range(size)) for shift, size in CODE_PARTS21)
+
+
+SYNDROME_TABLES21 = part_tables(hamming_syndrome)
+STREAM_SYNDROME_TABLES21 = part_tables(lambda codeword: hamming_syndrome(codeword, SYNDROME_MASKS21))
+DATA_TABLES21 = part_tables(hamming_data_bits)
+# Действие по синдрому — маска XOR исправляемого бита; 0 — ошибки нет или она
+# не исправляется (текстовый режим: несколько контрольных бит, поток: синдром > 21)
+CORRECTIONS21 = tuple(1 << (21 - syndrome) if syndrome and not syndrome & (syndrome - 1) else 0
+                      for syndrome in range(32))
+STREAM_CORRECTIONS21 = tuple(1 << (21 - syndrome) if 0 < syndrome <= 21 else 0 for syndrome in range(32))
+
+
+def table_encode_word(word):
+    return ENCODE_HIGH[word >> 8] ^ ENCODE_LOW[word & 0xFF]
+
+
+def table_decode_word(codeword, syndrome_tables=SYNDROME_TABLES21, corrections=CORRECTIONS21):
+    # То же, что hamming_decode_word (или hamming_correct_word с таблицами потока),
+    # но синдром, исправление и информационные биты — обращения к таблицам
+    high, middle, low = syndrome_tables
+    syndrome = high[codeword >> 13] ^ middle[codeword >> 5 & 0xFF] ^ low[codeword & 0x1F]
+    codeword ^= corrections[syndrome]
+    high, middle, low = DATA_TABLES21
+    return high[codeword >> 13] | middle[codeword >> 5 & 0xFF] | low[codeword & 0x1F], syndrome
 
 
 def counter(position, variable):
@@ -31,6 +153,10 @@ def to_hamming(value, position=POSITION16_5):
     elif not is_bool(bit16):
         raise ValueError("Число не двоичное")
 
+    if position == POSITION16_5:
+        return format(table_encode_word(int(bit16, 2)), '021b')
+
+    # Другая раскладка контрольных бит — вставка в строку
     ecc_date = counter(ECC_POS, bit16)
     bit16 = list(bit16)
     for x in position:
@@ -51,31 +177,184 @@ def to_16bit(variable):
     elif not is_bool(variable):
         raise ValueError("Число не двоичное")
 
-    ecc21_date = counter(ECC_POS21, variable)
-    err_list = checker(variable, ecc21_date)
-    bit21ecc = list(str(variable))
-    result = ""
-
-    # Рассчёт синдрома ошибки для проверки типа ошибки
-    syndrome = sum((1 << i) for i in err_list) if err_list else 0
-
-    if syndrome == 0:
-        # Нет ошибок
-        result = ""
-    elif len(err_list) == 1:
-        # Одиночная ошибка
-        err_pos = syndrome - 1
-        bit21ecc[err_pos] = '1' if bit21ecc[err_pos] == '0' else '0'
-        result = f"Исправлена одиночная ошибка в бите {err_pos + 1}\n"
-    else:
-        # Двойная ошибка
-        result = f"Обнаружена двойная ошибка (биты {err_list}), не исправляется\n"
-
-    # Удаление контрольных битов
-    for x in [15, 7, 3, 1, 0]:
-        del bit21ecc[x]
-
-    return ''.join(bit21ecc), result
+    word, syndrome = table_decode_word(int(variable, 2))
+    return format(word, '016b'), syndrome_report(syndrome)
+
+
+# Поток кода Хэмминга для произвольных байтов: сигнатура, затем 21-битные коды
+# 16-битных слов, упакованные по 8 кодов в 21 байт (неполная последняя группа
+# дополняется нулями до целого байта); последний байт — 1, если в последнем
+# слове только один байт данных, иначе 0. Длина заранее не нужна: один проход
+HAMMING_MAGIC = b"HMG1"
+CHUNK_WORDS = 1 << 15  # Слов в порции; кратно 8, чтобы порция была целым числом групп
+CHUNK_BYTES = CHUNK_WORDS * 21 // 8  # Размер закодированной порции
+
+
+def pack_codewords(codewords):
+    # Каждые 8 кодов по 21 биту — ровно 21 байт
+    output = bytearray()
+    for start in range(0, len(codewords), 8):
+        group = codewords[start:start + 8]
+        value = 0
+        for codeword in group:
+            value = value << 21 | codeword
+        bits = 21 * len(group)
+        output += (value << (-bits % 8)).to_bytes((bits + 7) // 8, 'big')
+    return output
+
+
+def unpack_codewords(data):
+    # Число кодов определяется по длине: дополнение меньше 8 бит, а код — 21 бит
+    count = len(data) * 8 // 21
+    if (21 * count + 7) // 8 != len(data):
+        raise ValueError("Файл поврежден: неполный блок")
+    codewords = []
+    for start in range(0, count, 8):
+        size = min(8, count - start)
+        group = data[start // 8 * 21:start // 8 * 21 + (21 * size + 7) // 8]
+        value = int.from_bytes(group, 'big') >> (-21 * size % 8)
+        for shift in range(21 * (size - 1), -1, -21):
+            codewords.append(value >> shift & 0x1FFFFF)
+    return codewords
+
+
+def encode_words(data):
+    # Байты (четное число) -> упакованные коды слов; код — по таблицам байтов
+    return pack_codewords([ENCODE_HIGH[high] ^ ENCODE_LOW[low] for high, low in zip(data[::2], data[1::2])])
+
+
+def decode_words(data, first_block, errors):
+    # Упакованные коды -> байты; блоки с ненулевым синдромом добавляются
+    # в errors парами (номер блока с единицы, синдром). Тело table_decode_word
+    # с таблицами потока встроено в цикл
+    syndrome_high, syndrome_middle, syndrome_low = STREAM_SYNDROME_TABLES21
+    data_high, data_middle, data_low = DATA_TABLES21
+    words = []
+    for number, codeword in enumerate(unpack_codewords(data), first_block):
+        syndrome = syndrome_high[codeword >> 13] ^ syndrome_middle[codeword >> 5 & 0xFF] ^ syndrome_low[codeword & 0x1F]
+        if syndrome:
+            errors.append((number, syndrome))
+            codeword ^= STREAM_CORRECTIONS21[syndrome]
+        words.append(data_high[codeword >> 13] | data_middle[codeword >> 5 & 0xFF] | data_low[codeword & 0x1F])
+    return struct.pack(f">{len(words)}H", *words)
+
+
+def hamming_encode_stream(source, output):
+    # Кодирование по порциям: в памяти одна порция и хвост меньше группы из 8 слов
+    output.write(HAMMING_MAGIC)
+    rest = b""
+    for chunk in iter(lambda: source.read(CHUNK_WORDS * 2), b""):
+        data = rest + chunk
+        whole = len(data) - len(data) % 16
+        output.write(encode_words(data[:whole]))
+        rest = data[whole:]
+    odd = len(rest) % 2
+    output.write(encode_words(rest + bytes(odd)))
+    output.write(bytes([odd]))
+
+
+def hamming_decode_stream(source, output):
+    # Декодирование по порциям; последняя порция и служебный байт узнаются
+    # только в конце потока, поэтому одна порция читается с опережением.
+    # Возвращается список (номер блока, синдром) для блоков с ошибками
+    if source.read(len(HAMMING_MAGIC)) != HAMMING_MAGIC:
+        raise ValueError("Файл не является потоком кода Хэмминга")
+    errors = []
+    block = 1
+    buffer = bytearray()
+    for chunk in iter(lambda: source.read(CHUNK_BYTES), b""):
+        buffer += chunk
+        if len(buffer) > CHUNK_BYTES + 1:  # После порции остаются данные и служебный байт
+            output.write(decode_words(bytes(buffer[:CHUNK_BYTES]), block, errors))
+            del buffer[:CHUNK_BYTES]
+            block += CHUNK_WORDS
+    if not buffer or buffer[-1] > 1 or (buffer[-1] and len(buffer) == 1):
+        raise ValueError("Файл поврежден: неверный последний байт")
+    decoded = decode_words(bytes(buffer[:-1]), block, errors)
+    output.write(decoded[:len(decoded) - buffer[-1]])
+    return errors
+
+
+def hamming_encode_file(input_path, output_path):
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as output:
+        hamming_encode_stream(source, output)
+
+
+def hamming_decode_file(input_path, output_path):
+    with open(input_path, 'rb') as source, open(output_path, 'wb') as output:
+        return hamming_decode_stream(source, output)
+
+
+def hamming_encode_bytes(data):
+    output = io.BytesIO()
+    hamming_encode_stream(io.BytesIO(data), output)
+    return output.getvalue()
+
+
+def hamming_decode_bytes(encoded):
+    # Возвращаются декодированные байты и список блоков с ошибками
+    output = io.BytesIO()
+    errors = hamming_decode_stream(io.BytesIO(encoded), output)
+    return output.getvalue(), errors
+
+
+def block_error_report(errors):
+    # Отчет по блокам в том же виде, что и в окне программы
+    return ''.join(f"Блок {number}: " + stream_syndrome_report(syndrome) for number, syndrome in errors)
+
+
+def hamming_benchmark(count=100000):
+    # Скорость строкового интерфейса, целочисленного кода на масках
+    # и табличного кода на одних и тех же случайных словах, а также потокового кодека
+    words = list(struct.unpack(f">{count}H", os.urandom(2 * count)))
+    strings = [format(word, '016b') for word in words]
+    codewords = [hamming_encode_word(word) for word in words]
+    coders = (("Строки", lambda: [to_hamming(word) for word in strings],
+               lambda: [to_16bit(format(codeword, '021b')) for codeword in codewords]),
+              ("Маски", lambda: [hamming_encode_word(word) for word in words],
+               lambda: [hamming_decode_word(codeword) for codeword in codewords]),
+              ("Таблицы", lambda: [table_encode_word(word) for word in words],
+               lambda: [table_decode_word(codeword) for codeword in codewords]))
+    lines = []
+    for name, encode, decode in coders:
+        start = time.perf_counter()
+        encode()
+        middle = time.perf_counter()
+        decode()
+        end = time.perf_counter()
+        lines.append(f"{name}: кодирование {count / (middle - start) / 1e3:.0f} тыс. слов/с, "
+                     f"декодирование {count / (end - middle) / 1e3:.0f} тыс. слов/с")
+    data = os.urandom(2 * count)
+    start = time.perf_counter()
+    encoded = hamming_encode_bytes(data)
+    middle = time.perf_counter()
+    hamming_decode_bytes(encoded)
+    end = time.perf_counter()
+    megabytes = len(data) / 1e6
+    lines.append(f"Поток: кодирование {megabytes / (middle - start):.2f} МБ/с, "
+                 f"декодирование {megabytes / (end - middle):.2f} МБ/с")
+    return "\n".join(lines)
+
+
+def cli(argv=None):
+    # Кодирование и декодирование файлов из командной строки, без окна программы
+    parser = argparse.ArgumentParser(description="Код Хэмминга (21,16) для произвольных файлов")
+    parser.add_argument("action", choices=["encode", "decode"], help="кодировать или декодировать")
+    parser.add_argument("input", help="входной файл")
+    parser.add_argument("output", help="выходной файл")
+    args = parser.parse_args(argv)
+    try:
+        if args.action == "encode":
+            hamming_encode_file(args.input, args.output)
+            print(f"Файл закодирован: {args.output}")
+        else:
+            errors = hamming_decode_file(args.input, args.output)
+            print(block_error_report(errors), end="")
+            print(f"Файл декодирован: {args.output}, блоков с ошибками: {len(errors)}")
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    return 0
 
 
 def load_file():
@@ -125,53 +404,58 @@ def decode_text():
     messagebox.showinfo("Декодирование завершено", "Процесс декодирования завершен.")
 
 
-# GUI приложение
-root = tk.Tk()
-root.title("Код Хэмминга (16,5) для текстовых файлов")
+if __name__ == "__main__":
+    # С аргументами — командная строка, без аргументов — окно программы
+    if len(sys.argv) > 1:
+        sys.exit(cli())
+
+    # GUI приложение
+    root = tk.Tk()
+    root.title("Код Хэмминга (16,5) для текстовых файлов")
 
-# Верхняя рамка для загрузки и кодирования
-frame_top = tk.Frame(root)
-frame_top.pack(pady=10)
+    # Верхняя рамка для загрузки и кодирования
+    frame_top = tk.Frame(root)
+    frame_top.pack(pady=10)
 
-# Кнопки загрузки и кодирования
-btn_load = tk.Button(frame_top, text="Загрузить файл", command=load_file)
-btn_load.grid(row=0, column=0, padx=5)
+    # Кнопки загрузки и кодирования
+    btn_load = tk.Button(frame_top, text="Загрузить файл", command=load_file)
+    btn_load.grid(row=0, column=0, padx=5)
 
-btn_encode = tk.Button(frame_top, text="Кодировать", command=encode_text)
-btn_encode.grid(row=0, column=1, padx=5)
+    btn_encode = tk.Button(frame_top, text="Кодировать", command=encode_text)
+    btn_encode.grid(row=0, column=1, padx=5)
 
-btn_decode = tk.Button(frame_top, text="Декодировать и исправить ошибки", command=decode_text)
-btn_decode.grid(row=0, column=2, padx=5)
+    btn_decode = tk.Button(frame_top, text="Декодировать и исправить ошибки", command=decode_text)
+    btn_decode.grid(row=0, column=2, padx=5)
 
-# Поля для отображения текстов
-frame_texts = tk.Frame(root)
-frame_texts.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+    # Поля для отображения текстов
+    frame_texts = tk.Frame(root)
+    frame_texts.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
-# Вводный текст
-lbl_input = tk.Label(frame_texts, text="Исходный текст")
-lbl_input.grid(row=0, column=0, sticky="w")
-input_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
-input_text.grid(row=1, column=0, padx=5, pady=5)
+    # Вводный текст
+    lbl_input = tk.Label(frame_texts, text="Исходный текст")
+    lbl_input.grid(row=0, column=0, sticky="w")
+    input_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
+    input_text.grid(row=1, column=0, padx=5, pady=5)
 
-# Закодированный текст
-lbl_encoded = tk.Label(frame_texts, text="Закодированный текст (можно редактировать)")
-lbl_encoded.grid(row=0, column=1, sticky="w")
-encoded_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
-encoded_text.grid(row=1, column=1, padx=5, pady=5)
+    # Закодированный текст
+    lbl_encoded = tk.Label(frame_texts, text="Закодированный текст (можно редактировать)")
+    lbl_encoded.grid(row=0, column=1, sticky="w")
+    encoded_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
+    encoded_text.grid(row=1, column=1, padx=5, pady=5)
 
-# Декодированный текст
-lbl_decoded = tk.Label(frame_texts, text="Декодированный текст")
-lbl_decoded.grid(row=0, column=2, sticky="w")
-decoded_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
-decoded_text.grid(row=1, column=2, padx=5, pady=5)
+    # Декодированный текст
+    lbl_decoded = tk.Label(frame_texts, text="Декодированный текст")
+    lbl_decoded.grid(row=0, column=2, sticky="w")
+    decoded_text = scrolledtext.ScrolledText(frame_texts, width=40, height=10)
+    decoded_text.grid(row=1, column=2, padx=5, pady=5)
 
-# Поле для вывода ошибок
-frame_errors = tk.Frame(root)
-frame_errors.pack(padx=10, pady=5, fill=tk.BOTH)
+    # Поле для вывода ошибок
+    frame_errors = tk.Frame(root)
+    frame_errors.pack(padx=10, pady=5, fill=tk.BOTH)
 
-lbl_errors = tk.Label(frame_errors, text="Отчёт об ошибках")
-lbl_errors.pack(anchor="w")
-error_log = scrolledtext.ScrolledText(frame_errors, width=100, height=5)
-error_log.pack(padx=5, pady=5)
+    lbl_errors = tk.Label(frame_errors, text="Отчёт об ошибках")
+    lbl_errors.pack(anchor="w")
+    error_log = scrolledtext.ScrolledText(frame_errors, width=100, height=5)
+    error_log.pack(padx=5, pady=5)
 
-root.mainloop()
+    root.mainloop()
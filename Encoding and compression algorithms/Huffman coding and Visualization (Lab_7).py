@@ -1,7 +1,10 @@
 import sys
+import io
 import os
-import pickle
+import re
 import heapq
+import struct
+import time
 from collections import Counter
 import networkx as nx
 import matplotlib.pyplot as plt
@@ -9,7 +12,7 @@ from tabulate import tabulate
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QLineEdit,
                              QFileDialog, QComboBox, QMessageBox, QFrame,
-                             QGroupBox, QTextBrowser)
+                             QGroupBox, QTextBrowser, QCheckBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPalette, QColor, QFont
 
@@ -29,9 +32,12 @@ class Node:
 
 
 def build_huffman_tree(text):
-    # Считаем частоты и вычисляем вероятности
-    frequency = Counter(text)
-    total_chars = len(text)
+    return build_frequency_tree(Counter(text))
+
+
+def build_frequency_tree(frequency):
+    # Вычисляем вероятности по готовым частотам символов
+    total_chars = sum(frequency.values())
     heap = [Node(char, freq/total_chars) for char, freq in frequency.items()]  # Делим на общее количество символов
     heapq.heapify(heap)
 
@@ -47,23 +53,112 @@ def build_huffman_tree(text):
     return heap[0]
 
 
-def generate_huffman_codes(node, current_code="", codes={}):
+def generate_huffman_codes(node, current_code="", codes=None, as_pairs=False):
+    # Обход дерева со стеком (без рекурсии); каждый вызов заполняет новую таблицу.
+    # При as_pairs=True код — пара (значение, длина в битах) для записи целыми
+    # числами, иначе строка '0'/'1'. Строковый код узла сохраняется для визуализации
+    if codes is None:
+        codes = {}
     if node is None:
-        return
+        return codes
+    stack = [(node, int(current_code or "0", 2), len(current_code))]
+    while stack:
+        node, value, length = stack.pop()
+        node.code = bin(value | 1 << length)[3:]  # Ведущая единица сохраняет ведущие нули кода
+        if node.char is not None:
+            codes[node.char] = (value, length) if as_pairs else node.code
+        # Правый узел кладется первым, чтобы левое поддерево обходилось раньше
+        if node.right is not None:
+            stack.append((node.right, value * 2 + 1, length + 1))
+        if node.left is not None:
+            stack.append((node.left, value * 2, length + 1))
+    return codes
+
 
-    node.code = current_code
+def code_lengths(node):
+    # Длина кода символа — глубина его листа в дереве
+    return {char: length for char, (_, length) in generate_huffman_codes(node, as_pairs=True).items()}
 
-    if node.char is not None:
-        codes[node.char] = current_code
-    generate_huffman_codes(node.left, current_code + "0", codes)
-    generate_huffman_codes(node.right, current_code + "1", codes)
+
+def canonical_codes(lengths):
+    # Символы упорядочиваются по (длина, символ); каждый следующий код —
+    # предыдущий плюс один, дополненный нулями до своей длины
+    codes = {}
+    code, previous = 0, 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous
+        codes[symbol] = format(code, f'0{length}b') if length else ""
+        code += 1
+        previous = length
     return codes
 
 
-def huffman_encode(text):
-    root = build_huffman_tree(text)
-    huffman_codes = generate_huffman_codes(root)
+def check_lengths(lengths):
+    # По длинам должен строиться префиксный код (неравенство Крафта)
+    if len(lengths) == 1:
+        return  # Единственный символ может иметь код любой длины, в том числе пустой
+    if any(length < 1 for length in lengths.values()):
+        raise ValueError("Файл поврежден: нулевая длина кода")
+    longest = max(lengths.values(), default=0)
+    if sum(1 << (longest - length) for length in lengths.values()) > 1 << longest:
+        raise ValueError("Файл поврежден: длины кодов не образуют префиксный код")
+
+
+def package_merge_lengths(frequency, max_length):
+    # Длины кодов не длиннее max_length бит (алгоритм package-merge): на каждом
+    # из max_length - 1 шагов соседние элементы списка объединяются в пакеты,
+    # и пакеты сливаются с исходными символами по весу; длина кода символа —
+    # число его вхождений в первые 2n - 2 элемента итогового списка
+    symbols = sorted(frequency, key=lambda char: frequency[char])
+    if len(symbols) == 1:
+        return {symbols[0]: 0}
+    if len(symbols) > 1 << max_length:
+        raise ValueError(f"{len(symbols)} символов не кодируются кодами длиной до {max_length} бит")
+    # Элемент — (вес, номер символа) или (вес, пара вложенных элементов)
+    leaves = [(frequency[char], index) for index, char in enumerate(symbols)]
+    current = leaves
+    for _ in range(max_length - 1):
+        packages = [(current[i][0] + current[i + 1][0], (current[i][1], current[i + 1][1]))
+                    for i in range(0, len(current) - 1, 2)]
+        current = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+    lengths = [0] * len(symbols)
+    stack = [item for _, item in current[:2 * len(symbols) - 2]]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            stack.extend(item)
+        else:
+            lengths[item] += 1
+    return dict(zip(symbols, lengths))
+
+
+def huffman_lengths(frequency, max_length=None):
+    # Если дерево Хаффмана глубже max_length, длины строятся заново с ограничением
+    lengths = code_lengths(build_frequency_tree(frequency))
+    if max_length is not None and max(lengths.values()) > max_length:
+        lengths = package_merge_lengths(frequency, max_length)
+    return lengths
+
+
+def average_code_length(lengths, frequency):
+    return sum(lengths[char] * freq for char, freq in frequency.items()) / sum(frequency.values())
+
+
+def length_limit_report(frequency, max_length):
+    # Сравнение средней длины кода с ограничением и без него
+    unlimited = average_code_length(huffman_lengths(frequency), frequency)
+    limited = average_code_length(huffman_lengths(frequency, max_length), frequency)
+    cost = (limited / unlimited - 1) * 100 if unlimited else 0.0  # Потеря сжатия в процентах
+    return (f"Средняя длина кода (не более {max_length} бит): {limited:.4f} бит\n"
+            f"Без ограничения: {unlimited:.4f} бит (+{cost:.2f}%)")
+
+
+def huffman_encode(text, max_length=None):
+    # max_length — ограничение длины кода (None — без ограничения).
+    # Канонические коды с теми же длинами: для декодирования достаточно длин
+    huffman_codes = canonical_codes(huffman_lengths(Counter(text), max_length))
     encoded_text = ''.join([huffman_codes[char] for char in text])
+    root = build_code_tree(huffman_codes, Counter(text))
     root.codes = huffman_codes  # Сохраняем коды в дереве
     return encoded_text, root
 
@@ -79,22 +174,745 @@ def huffman_decode(encoded_text, root):
     return ''.join(decoded_text)
 
 
+def format_lengths_line(lengths):
+    # Заголовок текстового формата: пары "номер символа:длина кода" через пробел
+    return ' '.join(f"{ord(char)}:{length}" for char, length in sorted(lengths.items()))
+
+
+def parse_lengths_line(line):
+    lengths = {}
+    for pair in line.split():
+        char, _, length = pair.partition(':')
+        lengths[chr(int(char))] = int(length)
+    check_lengths(lengths)
+    return lengths
+
+
+# Двоичный контейнер канонических кодов: сигнатура, число бит дополнения
+# в последнем байте, число символов в таблице, длина сообщения в символах;
+# затем таблица длин (байт символа, длина кода) и упакованные биты сообщения.
+# Сами коды восстанавливаются по длинам
+CONTAINER_MAGIC = b"PFX2"
+CONTAINER_HEADER = struct.Struct(">4sBHQ")
+CHUNK_SIZE = 1 << 16  # Сколько символов кодируется за один шаг
+PRIMARY_BITS = 12  # Ширина индекса первичной таблицы декодирования
+DECODERS = ("table", "tree")  # Табличный декодер и обход дерева по одному биту
+
+
+def code_pairs(codes):
+    # Коды в виде пар (значение, длина в битах) для записи целыми числами
+    return {symbol: (int(code or "0", 2), len(code)) for symbol, code in codes.items()}
+
+
+def numpy_code_tables(codes):
+    # Таблицы для упаковки байтов через NumPy: строка таблицы битов — биты кода
+    # байта, выровненные влево, строка таблицы масок отмечает, какие из них — код.
+    # NumPy импортируется здесь: без него байты пишутся через write_symbols
+    import numpy as np
+    width = max([len(code) for code in codes.values()] + [1])
+    bit_table = np.zeros((256, width), dtype=np.uint8)
+    mask_table = np.zeros((256, width), dtype=bool)
+    for symbol, code in codes.items():
+        bit_table[symbol, :len(code)] = [bit == '1' for bit in code]
+        mask_table[symbol, :len(code)] = True
+    return bit_table, mask_table
+
+
+class BitWriter:
+    # Биты накапливаются в целом числе, целые байты сразу сбрасываются в файл;
+    # между вызовами в памяти остается меньше байта
+    def __init__(self, file):
+        self.file = file
+        self.accumulator = 0  # Биты, не вошедшие в целые байты
+        self.bits = 0  # Число этих бит
+
+    def drain(self):
+        # Сброс целых байтов из аккумулятора в файл
+        whole, rest = self.bits >> 3, self.bits & 7
+        if whole:
+            self.file.write((self.accumulator >> rest).to_bytes(whole, 'big'))
+            self.accumulator &= (1 << rest) - 1
+            self.bits = rest
+
+    def write(self, bits):
+        # Запись строки бит '0'/'1'
+        if bits:
+            self.accumulator = self.accumulator << len(bits) | int(bits, 2)
+            self.bits += len(bits)
+            self.drain()
+
+    def write_symbols(self, data, pairs):
+        # Запись кодов символов по таблице пар (значение, длина): каждые 64 бита
+        # аккумулятора выводятся восемью байтами
+        accumulator, bits = self.accumulator, self.bits
+        output = bytearray()
+        for symbol in data:
+            value, length = pairs[symbol]
+            accumulator = accumulator << length | value
+            bits += length
+            while bits >= 64:
+                bits -= 64
+                output += (accumulator >> bits).to_bytes(8, 'big')
+                accumulator &= (1 << bits) - 1
+        self.file.write(output)
+        self.accumulator, self.bits = accumulator, bits
+        self.drain()
+
+    def write_bytes(self, data, tables):
+        # Запись кодов байтов через NumPy: строки таблиц выбираются по байтам
+        # через take, лишние столбцы отсекаются масками, и биты упаковываются
+        # в байты одним вызовом packbits
+        import numpy as np
+        bit_table, mask_table = tables
+        symbols = np.frombuffer(data, dtype=np.uint8)
+        bits = np.take(bit_table, symbols, axis=0)[np.take(mask_table, symbols, axis=0)]
+        if self.bits:
+            prefix = np.unpackbits(np.array([self.accumulator << (8 - self.bits)], dtype=np.uint8))
+            bits = np.concatenate((prefix[:self.bits], bits))
+        whole = len(bits) & ~7
+        self.file.write(np.packbits(bits[:whole]).tobytes())
+        self.bits = len(bits) - whole
+        self.accumulator = int(np.packbits(bits[whole:])[0]) >> (8 - self.bits) if self.bits else 0
+
+    def flush(self):
+        # Последний байт дополняется нулями; возвращается число бит дополнения
+        padding = -self.bits % 8
+        if self.bits:
+            self.file.write(bytes([self.accumulator << padding]))
+        self.accumulator, self.bits = 0, 0
+        return padding
+
+
+def byte_writer(writer, codes):
+    # Способ записи байтов: через NumPy, а без него — через таблицу пар
+    try:
+        return writer.write_bytes, numpy_code_tables(codes)
+    except ImportError:
+        return writer.write_symbols, code_pairs(codes)
+
+
+def pack_bits(data, codes):
+    # Коды символов упаковываются порциями: байты — через NumPy, остальные
+    # последовательности символов (и байты без NumPy) — через целочисленный аккумулятор
+    output = io.BytesIO()
+    writer = BitWriter(output)
+    write, tables = byte_writer(writer, codes) if isinstance(data, (bytes, bytearray)) \
+        else (writer.write_symbols, code_pairs(codes))
+    for start in range(0, len(data), CHUNK_SIZE):
+        write(data[start:start + CHUNK_SIZE], tables)
+    padding = writer.flush()
+    return output.getvalue(), padding
+
+
+def container_header(lengths, count, padding):
+    header = bytearray(CONTAINER_HEADER.pack(CONTAINER_MAGIC, padding, len(lengths), count))
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        header += bytes([symbol, length])
+    return bytes(header)
+
+
+def write_container(data, lengths):
+    # Сообщение кодируется каноническими кодами, в заголовок пишутся только длины
+    payload, padding = pack_bits(data, canonical_codes(lengths))
+    return container_header(lengths, len(data), padding) + payload
+
+
+def read_chunks(path):
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            yield chunk
+
+
+def count_bytes(data):
+    # Частоты байтов через bincount: в Counter попадают только встреченные байты.
+    # Без NumPy байты считаются самим Counter в том же порядке — по значению байта
+    try:
+        import numpy as np
+    except ImportError:
+        return Counter(dict(sorted(Counter(data).items())))
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    return Counter({symbol: int(counts[symbol]) for symbol in np.flatnonzero(counts).tolist()})
+
+
+def count_file(path):
+    # Первый проход потокового кодирования: частоты байтов по порциям
+    frequency = Counter()
+    for chunk in read_chunks(path):
+        frequency.update(count_bytes(chunk))
+    return frequency
+
+
+def write_container_file(input_path, output_path, frequency, lengths):
+    # Второй проход: файл кодируется по порциям, упакованные байты сразу пишутся
+    # в выходной файл. Число бит дополнения известно заранее из частот и длин,
+    # поэтому заголовок пишется первым. В памяти — одна порция и таблица кодов
+    total_bits = sum(freq * lengths[symbol] for symbol, freq in frequency.items())
+    with open(output_path, 'wb') as output:
+        output.write(container_header(lengths, sum(frequency.values()), -total_bits % 8))
+        writer = BitWriter(output)
+        write, tables = byte_writer(writer, canonical_codes(lengths))
+        for chunk in read_chunks(input_path):
+            write(chunk, tables)
+        writer.flush()
+
+
+def read_container(container):
+    if len(container) < CONTAINER_HEADER.size or not container.startswith(CONTAINER_MAGIC):
+        raise ValueError("Файл не является двоичным контейнером")
+    _, padding, table_size, count = CONTAINER_HEADER.unpack_from(container)
+    position = CONTAINER_HEADER.size + 2 * table_size
+    if position > len(container):
+        raise ValueError("Файл поврежден: неполная таблица кодов")
+    table = container[CONTAINER_HEADER.size:position]
+    lengths = dict(zip(table[::2], table[1::2]))
+    if len(lengths) != table_size:
+        raise ValueError("Файл поврежден: символ повторяется в таблице кодов")
+    check_lengths(lengths)
+    return canonical_codes(lengths), count, padding, container[position:]
+
+
+def build_code_tree(codes, frequency=None):
+    # Дерево восстанавливается по таблице кодов; если известны частоты
+    # символов, в узлы записываются вероятности, как в build_huffman_tree
+    total = sum(frequency.values()) if frequency else 0
+    root = Node(None, 0)
+    for symbol, code in codes.items():
+        probability = frequency.get(symbol, 0) / total if total else 0
+        node = root
+        node.freq += probability
+        for depth, bit in enumerate(code, 1):
+            if bit == '0':
+                node.left = node.left or Node(None, 0)
+                node = node.left
+            else:
+                node.right = node.right or Node(None, 0)
+                node = node.right
+            node.freq += probability
+            node.code = code[:depth]
+        node.char = symbol
+    return root
+
+
+def decode_packed(payload, padding, codes, count):
+    root = build_code_tree(codes)
+    if root.char is not None:
+        return bytes([root.char]) * count  # Единственный символ с пустым кодом
+    decoded = bytearray()
+    node = root
+    total_bits = len(payload) * 8 - padding
+    for start in range(0, len(payload), CHUNK_SIZE):
+        chunk = payload[start:start + CHUNK_SIZE]
+        bits = format(int.from_bytes(chunk, 'big'), f'0{len(chunk) * 8}b')
+        for bit in bits[:total_bits - start * 8]:
+            node = node.left if bit == '0' else node.right
+            if node is None:
+                raise ValueError("Файл поврежден: неизвестный код")
+            if node.char is not None:
+                decoded.append(node.char)
+                node = root
+    if len(decoded) != count:
+        raise ValueError("Файл поврежден: длина сообщения не совпадает с заголовком")
+    return bytes(decoded)
+
+
+def build_table(codes, bits):
+    # Индекс — следующие bits бит, элемент — (байты символа или токена, длина кода); для кодов
+    # длиннее bits — (вложенная таблица, -ширина ее индекса); (b"", 0) — такого кода нет
+    table = [(b"", 0)] * (1 << bits)
+    longer = {}
+    for symbol, code in codes:
+        if len(code) <= bits:
+            span = 1 << (bits - len(code))
+            start = int(code, 2) * span
+            unit = symbol if isinstance(symbol, bytes) else bytes([symbol])  # Токен — уже байты
+            table[start:start + span] = [(unit, len(code))] * span
+        else:
+            longer.setdefault(code[:bits], []).append((symbol, code[bits:]))
+    for prefix, rest in longer.items():
+        sub_bits = min(max(len(code) for _, code in rest), bits)
+        table[int(prefix, 2)] = (build_table(rest, sub_bits), -sub_bits)
+    return table
+
+
+def build_decode_tables(codes, primary_bits=PRIMARY_BITS):
+    # Первичная таблица с несколькими символами на элемент: за одно обращение
+    # декодируются все коды, целиком поместившиеся в primary_bits бит
+    base = build_table(sorted(codes.items()), primary_bits)
+    mask = (1 << primary_bits) - 1
+    primary = []
+    for index, (symbols, used) in enumerate(base):
+        if used > 0:
+            while True:
+                # Следующий код — в оставшихся used..primary_bits битах индекса
+                next_symbols, next_used = base[(index << used) & mask]
+                if next_used <= 0 or used + next_used > primary_bits:
+                    break
+                symbols += next_symbols
+                used += next_used
+        primary.append((symbols, used))
+    return primary
+
+
+def decode_packed_table(payload, padding, codes, count, primary_bits=PRIMARY_BITS):
+    # count — длина сообщения в байтах (для токенов — суммарная длина токенов)
+    if len(codes) == 1 and not next(iter(codes.values())):
+        return bytes([next(iter(codes))]) * count  # Единственный символ с пустым кодом
+    primary = build_decode_tables(codes, primary_bits)
+    mask = (1 << primary_bits) - 1
+    padded = bytes(payload) + bytes(16)  # Чтобы всегда можно было прочитать 16 байт
+    total_bits = len(payload) * 8 - padding
+    decoded = bytearray()
+    position = 0
+    while len(decoded) < count and position + primary_bits <= total_bits:
+        byte_position = position >> 3
+        window = int.from_bytes(padded[byte_position:byte_position + 16], 'big')
+        available = 128 - (position & 7)
+        # Индекс таблицы не должен заходить за конец сообщения, иначе элемент
+        # с несколькими символами захватит биты дополнения
+        floor = max(primary_bits, byte_position * 8 + 128 + primary_bits - total_bits)
+        # Несколько обращений к таблице на одно чтение 128-битного окна
+        while available >= floor:
+            symbols, used = primary[(window >> (available - primary_bits)) & mask]
+            if used <= 0:
+                break
+            decoded += symbols
+            available -= used
+        position = byte_position * 8 + 128 - available
+        if available >= floor:
+            # Длинный код: спускаемся по вложенным таблицам
+            table, bits = primary, primary_bits
+            while True:
+                byte_position = position >> 3
+                window = int.from_bytes(padded[byte_position:byte_position + 16], 'big')
+                symbols, used = table[(window >> (128 - (position & 7) - bits)) & ((1 << bits) - 1)]
+                if not used:
+                    raise ValueError("Файл поврежден: неизвестный код")
+                if used > 0:
+                    break
+                position += bits
+                table, bits = symbols, -used
+            if position + used > total_bits:
+                raise ValueError("Файл поврежден: неполный код")
+            decoded += symbols
+            position += used
+    if len(decoded) < count and position < total_bits:
+        # Хвост короче primary_bits бит — обход дерева кодов по одному биту
+        root = build_code_tree(codes)
+        node = root
+        offset = position & 7
+        bits = format(int.from_bytes(padded[position >> 3:(position >> 3) + 16], 'big'), '0128b')
+        for bit in bits[offset:offset + total_bits - position]:
+            node = node.left if bit == '0' else node.right
+            if node is None:
+                raise ValueError("Файл поврежден: неизвестный код")
+            if node.char is not None:
+                decoded += node.char if isinstance(node.char, bytes) else bytes([node.char])
+                node = root
+    if len(decoded) < count:
+        raise ValueError("Файл поврежден: длина сообщения не совпадает с заголовком")
+    return bytes(decoded[:count])
+
+
+def huffman_encode_bytes(data, max_length=None):
+    # Кодирование байтов в двоичный контейнер
+    if not data:
+        return write_container(data, {}), None
+    frequency = count_bytes(data)
+    lengths = huffman_lengths(frequency, max_length)
+    huffman_codes = canonical_codes(lengths)
+    root = build_code_tree(huffman_codes, frequency)
+    root.codes = huffman_codes
+    return write_container(data, lengths), root
+
+
+def huffman_encode_file(input_path, output_path, max_length=None):
+    # Потоковое кодирование файла в два прохода; возвращается дерево
+    # канонических кодов (None для пустого файла) и частоты байтов
+    frequency = count_file(input_path)
+    lengths = huffman_lengths(frequency, max_length) if frequency else {}
+    write_container_file(input_path, output_path, frequency, lengths)
+    if not frequency:
+        return None, frequency
+    huffman_codes = canonical_codes(lengths)
+    root = build_code_tree(huffman_codes, frequency)
+    root.codes = huffman_codes
+    return root, frequency
+
+
+def huffman_decode_bytes(container, decoder="table"):
+    # decoder — табличный декодер ("table") или обход дерева по одному биту ("tree")
+    if decoder not in DECODERS:
+        raise ValueError(f"Неизвестный декодер: {decoder}")
+    codes, count, padding, payload = read_container(container)
+    if not count:
+        return b""
+    if decoder == "table":
+        return decode_packed_table(payload, padding, codes, count)
+    return decode_packed(payload, padding, codes, count)
+
+
+# Контейнер с алфавитом токенов: сигнатура, номер токенизатора, число бит
+# дополнения, размер алфавита, длина исходных данных в байтах; затем для каждого
+# токена — длина кода, длина токена в байтах и сами байты токена
+TOKEN_MAGIC = b"PFT1"
+TOKEN_HEADER = struct.Struct(">4sBBIQ")
+TOKENIZERS = ("chars", "bytes", "words", "pairs")
+PAIR_COUNT = 256  # Сколько самых частых пар байтов становится токенами
+# Символ UTF-8; байт, не входящий в правильную последовательность, — отдельный токен
+CHAR_PATTERN = rb"[\xc0-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf7][\x80-\xbf]{3}|."
+# Слово — до 63 букв, цифр или символов UTF-8 подряд (токен не длиннее 255 байт)
+WORD_PATTERN = rb"(?:[0-9A-Za-z_]|[\xc0-\xf7][\x80-\xbf]{1,3}){1,63}"
+CHAR_RE = re.compile(CHAR_PATTERN, re.DOTALL)
+WORD_RE = re.compile(WORD_PATTERN + b"|" + CHAR_PATTERN, re.DOTALL)
+
+
+def tokenize(data, tokenizer="chars", pair_count=PAIR_COUNT):
+    # Разбиение байтов на токены алфавита: символы UTF-8, байты, слова
+    # (слова, встреченные один раз, разбиваются на символы — иначе таблица
+    # в заголовке дороже выигрыша) или pair_count самых частых пар байтов
+    # с разбиением остального на символы
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(f"Неизвестный токенизатор: {tokenizer}")
+    if tokenizer == "bytes":
+        return re.findall(b".", data, re.DOTALL)
+    if tokenizer == "chars":
+        return CHAR_RE.findall(data)
+    if tokenizer == "words":
+        tokens = WORD_RE.findall(data)
+        frequency = Counter(tokens)
+        result = []
+        for token in tokens:
+            if frequency[token] > 1:
+                result.append(token)
+            else:
+                result.extend(CHAR_RE.findall(token))
+        return result
+    pairs = frequent_pairs(data, pair_count)
+    # Пары в шаблоне сгруппированы по первому байту: меньше альтернатив на каждой позиции
+    groups = {}
+    for pair in pairs:
+        groups.setdefault(pair[:1], []).append(pair[1:])
+    alternatives = [re.escape(first) + b"[" + b"".join(re.escape(second) for second in seconds) + b"]"
+                    for first, seconds in groups.items()]
+    return re.findall(b"|".join(alternatives + [CHAR_PATTERN]), data, re.DOTALL)
+
+
+def frequent_pairs(data, pair_count):
+    # pair_count самых частых пар соседних байтов, встреченных больше одного раза;
+    # при равных частотах первой идет пара с большим номером. Частоты считаются
+    # через bincount по номерам пар, без NumPy — через Counter
+    try:
+        import numpy as np
+    except ImportError:
+        counts = Counter(data[i:i + 2] for i in range(len(data) - 1))
+        top = sorted(counts, key=lambda pair: (counts[pair], pair), reverse=True)[:pair_count]
+        return [pair for pair in top if counts[pair] > 1]
+    symbols = np.frombuffer(data, dtype=np.uint8).astype(np.uint32)
+    counts = np.bincount(symbols[:-1] * 256 + symbols[1:], minlength=1 << 16)
+    top = np.argsort(counts, kind='stable')[::-1][:pair_count]
+    return [int(pair).to_bytes(2, 'big') for pair in top if counts[pair] > 1]
+
+
+def token_header(tokenizer, lengths, size, padding):
+    header = bytearray(TOKEN_HEADER.pack(TOKEN_MAGIC, TOKENIZERS.index(tokenizer), padding, len(lengths), size))
+    for token, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        header += bytes([length, len(token)]) + token
+    return bytes(header)
+
+
+def read_token_container(container):
+    if len(container) < TOKEN_HEADER.size or not container.startswith(TOKEN_MAGIC):
+        raise ValueError("Файл не является контейнером токенов")
+    _, tokenizer, padding, table_size, size = TOKEN_HEADER.unpack_from(container)
+    if tokenizer >= len(TOKENIZERS):
+        raise ValueError("Файл поврежден: неизвестный токенизатор")
+    lengths = {}
+    position = TOKEN_HEADER.size
+    for _ in range(table_size):
+        token_size = container[position + 1] if position + 2 <= len(container) else 0
+        token = bytes(container[position + 2:position + 2 + token_size])
+        if not token_size or len(token) < token_size:
+            raise ValueError("Файл поврежден: неполная таблица кодов")
+        if token in lengths:
+            raise ValueError("Файл поврежден: токен повторяется в таблице кодов")
+        lengths[token] = container[position]
+        position += 2 + token_size
+    check_lengths(lengths)
+    return TOKENIZERS[tokenizer], canonical_codes(lengths), size, padding, container[position:]
+
+
+def tokenized_encode_bytes(data, tokenizer="chars", max_length=None, pair_count=PAIR_COUNT):
+    # Кодирование Хаффмана по алфавиту токенов; алфавит хранится в заголовке,
+    # поэтому декодеру токенизатор не нужен. Возвращается контейнер и дерево кодов
+    tokens = tokenize(data, tokenizer, pair_count)
+    if not tokens:
+        return token_header(tokenizer, {}, 0, 0), None
+    frequency = Counter(tokens)
+    lengths = huffman_lengths(frequency, max_length)
+    huffman_codes = canonical_codes(lengths)
+    payload, padding = pack_bits(tokens, huffman_codes)
+    root = build_code_tree(huffman_codes, frequency)
+    root.codes = huffman_codes
+    return token_header(tokenizer, lengths, len(data), padding) + payload, root
+
+
+def tokenized_decode_bytes(container):
+    # Табличный декодер выдает байты токенов, поэтому длина сообщения — в байтах
+    _, codes, size, padding, payload = read_token_container(container)
+    if not size:
+        return b""
+    if len(codes) == 1 and not next(iter(codes.values())):
+        token = next(iter(codes))  # Единственный токен с пустым кодом
+        return (token * (size // len(token) + 1))[:size]
+    return decode_packed_table(payload, padding, codes, size)
+
+
+def tokenizer_benchmark(data, max_length=None):
+    # Степень сжатия и скорость кодирования Хаффмана для каждого алфавита
+    lines = []
+    for tokenizer in TOKENIZERS:
+        start = time.perf_counter()
+        encoded, root = tokenized_encode_bytes(data, tokenizer, max_length)
+        middle = time.perf_counter()
+        if tokenized_decode_bytes(encoded) != data:
+            raise ValueError(f"{tokenizer}: декодированные данные не совпадают с исходными")
+        end = time.perf_counter()
+        megabytes = len(data) / 1e6
+        alphabet = len(root.codes) if root else 0
+        lines.append(f"{tokenizer}: {len(data)} -> {len(encoded)} байт "
+                     f"(степень сжатия {len(data) / max(len(encoded), 1):.2f}, алфавит {alphabet}), "
+                     f"кодирование {megabytes / (middle - start):.2f} МБ/с, "
+                     f"декодирование {megabytes / (end - middle):.2f} МБ/с")
+    return "\n".join(lines)
+
+
+# Поток адаптивного кода Хаффмана: сигнатура, биты кодов, последний байт —
+# число бит дополнения. Длина сообщения заранее не нужна: кодирование в один проход
+ADAPTIVE_MAGIC = b"AHF1"
+
+
+class AdaptiveHuffmanTree:
+    # Адаптивный код Хаффмана (алгоритм FGK): дерево перестраивается после каждого
+    # символа, поэтому подсчет частот заранее не нужен. Узлы упорядочены по
+    # неубыванию веса (свойство соседства); новый байт передается кодом узла NYT
+    # и восемью битами самого байта. Узлов не больше 513 — память ограничена
+    def __init__(self):
+        self.root = 0  # Корень всегда узел 0: в начале это NYT
+        self.nyt = 0  # Узел для еще не встречавшихся байтов
+        self.weight = [0]
+        self.parent = [-1]  # -1 у корня
+        self.children = [None]  # [левый, правый] у внутреннего узла
+        self.symbol = [None]  # Байт листа
+        self.order = [0]  # Узлы по возрастанию номера (и веса)
+        self.rank = [0]  # Номер узла в order
+        self.leaves = {}  # Байт -> лист
+
+    def code(self, node):
+        # Код узла — путь от корня
+        bits = []
+        while node != self.root:
+            parent = self.parent[node]
+            bits.append('1' if self.children[parent][1] == node else '0')
+            node = parent
+        return ''.join(reversed(bits))
+
+    def encode(self, symbol):
+        leaf = self.leaves.get(symbol)
+        if leaf is None:
+            return self.code(self.nyt) + format(symbol, '08b')
+        return self.code(leaf)
+
+    def add_node(self, parent, symbol):
+        self.weight.append(0)
+        self.parent.append(parent)
+        self.children.append(None)
+        self.symbol.append(symbol)
+        self.rank.append(0)
+        return len(self.weight) - 1
+
+    def swap(self, first, second):
+        # Обмен местами двух поддеревьев вместе с их номерами
+        first_parent, second_parent = self.parent[first], self.parent[second]
+        if first_parent == second_parent:
+            self.children[first_parent].reverse()
+        else:
+            self.children[first_parent][self.children[first_parent].index(first)] = second
+            self.children[second_parent][self.children[second_parent].index(second)] = first
+            self.parent[first], self.parent[second] = second_parent, first_parent
+        self.rank[first], self.rank[second] = self.rank[second], self.rank[first]
+        self.order[self.rank[first]], self.order[self.rank[second]] = first, second
+
+    def update(self, symbol):
+        node = self.leaves.get(symbol)
+        if node is None:
+            # NYT становится внутренним узлом: слева новый NYT, справа лист байта
+            old_nyt = self.nyt
+            self.nyt = self.add_node(old_nyt, None)
+            node = self.add_node(old_nyt, symbol)
+            self.children[old_nyt] = [self.nyt, node]
+            self.leaves[symbol] = node
+            self.order[0:0] = [self.nyt, node]
+            for index, item in enumerate(self.order):
+                self.rank[item] = index
+        weight, order, rank, parent = self.weight, self.order, self.rank, self.parent
+        last = len(order) - 1
+        while node != -1:
+            # Узел меняется местами со старшим по номеру узлом того же веса (кроме
+            # родителя: с предком поддерево обменять нельзя, тогда берется следующий)
+            index = rank[node]
+            while index < last and weight[order[index + 1]] == weight[node]:
+                index += 1
+            if order[index] == parent[node]:
+                index -= 1
+            if order[index] != node:
+                self.swap(node, order[index])
+            weight[node] += 1
+            node = parent[node]
+
+
+def adaptive_encode_stream(source, output):
+    # Кодирование потока байтов (файл, канал) за один проход
+    output.write(ADAPTIVE_MAGIC)
+    tree = AdaptiveHuffmanTree()
+    writer = BitWriter(output)
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+        bits = []
+        for symbol in chunk:
+            bits.append(tree.encode(symbol))
+            tree.update(symbol)
+        writer.write(''.join(bits))
+    output.write(bytes([writer.flush()]))  # Последний байт — число бит дополнения
+
+
+def adaptive_stream_bits(source):
+    # Два последних прочитанных байта придерживаются, пока не станет ясно,
+    # что поток закончился (последний байт — дополнение)
+    pending = b""
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+        data = pending + chunk
+        body, pending = data[:-2], data[-2:]
+        if body:
+            yield from format(int.from_bytes(body, 'big'), f'0{len(body) * 8}b')
+    if not pending or pending[-1] > 7 or (pending[-1] and len(pending) < 2):
+        raise ValueError("Файл поврежден: неверный байт дополнения")
+    if len(pending) == 2:
+        yield from format(pending[0], '08b')[:8 - pending[-1]]
+
+
+def adaptive_decode_stream(source, output):
+    # Декодер перестраивает дерево так же, как кодер
+    if source.read(len(ADAPTIVE_MAGIC)) != ADAPTIVE_MAGIC:
+        raise ValueError("Файл не является потоком адаптивного кода")
+    tree = AdaptiveHuffmanTree()
+    decoded = bytearray()
+    node, raw = None, 1  # node = None: читаются 8 бит нового байта (raw с маркерной единицей)
+    for bit in adaptive_stream_bits(source):
+        if node is None:
+            raw = raw * 2 + (bit == '1')
+            if raw < 256:
+                continue
+            symbol = raw - 256
+        else:
+            node = tree.children[node][bit == '1']
+            if node == tree.nyt:
+                node, raw = None, 1
+                continue
+            symbol = tree.symbol[node]
+            if symbol is None:
+                continue
+        decoded.append(symbol)
+        tree.update(symbol)
+        node = tree.root
+        if len(decoded) >= CHUNK_SIZE:
+            output.write(decoded)
+            decoded.clear()
+    if (node != tree.root) if tree.leaves else raw != 1:
+        raise ValueError("Файл поврежден: поток оборван посреди кода")
+    output.write(decoded)
+
+
+def adaptive_encode_bytes(data):
+    output = io.BytesIO()
+    adaptive_encode_stream(io.BytesIO(data), output)
+    return output.getvalue()
+
+
+def adaptive_decode_bytes(encoded):
+    output = io.BytesIO()
+    adaptive_decode_stream(io.BytesIO(encoded), output)
+    return output.getvalue()
+
+
+def adaptive_benchmark(data):
+    # Скорость статического (два прохода) и адаптивного (один проход)
+    # кодирования Хаффмана на одних и тех же данных
+    coders = (("Статический", lambda message: huffman_encode_bytes(message)[0], huffman_decode_bytes),
+              ("Адаптивный", adaptive_encode_bytes, adaptive_decode_bytes))
+    lines = []
+    for name, encode, decode in coders:
+        start = time.perf_counter()
+        encoded = encode(data)
+        middle = time.perf_counter()
+        if decode(encoded) != data:
+            raise ValueError(f"{name}: декодированные данные не совпадают с исходными")
+        end = time.perf_counter()
+        megabytes = len(data) / 1e6
+        lines.append(f"{name}: {len(data)} -> {len(encoded)} байт, "
+                     f"кодирование {megabytes / (middle - start):.2f} МБ/с, "
+                     f"декодирование {megabytes / (end - middle):.2f} МБ/с")
+    return "\n".join(lines)
+
+
+def read_encoded_tree(data):
+    # Дерево для визуализации строится по длинам кодов из закодированного файла
+    # (двоичного контейнера или текстового формата), вероятности — по сообщению
+    if data.startswith(ADAPTIVE_MAGIC):
+        raise ValueError("Дерево адаптивного кода меняется после каждого символа и не сохраняется в файле")
+    if data.startswith(TOKEN_MAGIC):
+        # Частоты токенов — по повторному разбиению сообщения тем же токенизатором
+        tokenizer, codes = read_token_container(data)[:2]
+        frequency = Counter(tokenize(tokenized_decode_bytes(data), tokenizer))
+    elif data.startswith(CONTAINER_MAGIC):
+        codes = read_container(data)[0]
+        frequency = Counter(huffman_decode_bytes(data))
+    else:
+        header, _, encoded_text = data.decode('utf-8').partition("\n")
+        codes = canonical_codes(parse_lengths_line(header))
+        frequency = Counter(huffman_decode(encoded_text, build_code_tree(codes)))
+    root = build_code_tree(codes, frequency)
+    root.codes = codes
+    return root
+
+
+def symbol_display(char):
+    # Символы текста — строки, символы двоичного контейнера — байты (int),
+    # токены — последовательности байтов (bytes)
+    if isinstance(char, bytes):
+        char = char.decode('utf-8', 'backslashreplace')
+        if len(char) > 1:
+            return repr(char)[1:-1]  # Слово или пара: управляющие символы экранируются
+    if isinstance(char, int):
+        if char == 32 or char == 10 or 32 < char < 127:
+            char = chr(char)
+        else:
+            return f"0x{char:02X}"
+    if char == ' ':
+        return 'ПРОБЕЛ'
+    if char == '\n':
+        return '\\n'
+    return char
+
+
 def format_huffman_codes(codes):
     table_data = []
     for char, code in sorted(codes.items()):
-        if char == ' ':
-            char_display = 'ПРОБЕЛ'
-        elif char == '\n':
-            char_display = '\\n'
-        else:
-            char_display = char
-        table_data.append([char_display, code, len(code)])
+        table_data.append([symbol_display(char), code, len(code)])
 
     headers = ['Символ', 'Код', 'Длина кода']
     table = tabulate(table_data, headers=headers, tablefmt='grid')
 
     # Вычисляем статистику с учетом частоты появления символов
-    frequency = Counter(''.join(str(char) * len(code) for char, code in codes.items()))
+    frequency = {char: len(code) for char, code in codes.items()}
     total_bits = sum(len(codes[char]) * freq for char, freq in frequency.items())
     total_chars = sum(frequency.values())
     avg_code_length = total_bits / total_chars if total_chars > 0 else 0
@@ -109,6 +927,10 @@ def format_huffman_codes(codes):
     return table + stats
 
 
+# Алфавиты в интерфейсе: название -> токенизатор (None — потоковое кодирование байтов)
+ALPHABETS = {"Байты": None, "Символы": "chars", "Слова": "words", "Пары байтов": "pairs"}
+
+
 class StyleHelper:
     @staticmethod
     def setup_dark_theme(app):
@@ -234,20 +1056,7 @@ class HuffmanGUI(QMainWindow):
         input_layout.addWidget(self.input_file)
         input_layout.addWidget(input_browse)
 
-        # Выбор файла дерева
-        tree_layout = QHBoxLayout()
-        self.tree_file = QLineEdit()
-        self.tree_file.setStyleSheet(StyleHelper.get_line_edit_style())
-        self.tree_file.setPlaceholderText("Путь к файлу дерева...")
-        tree_browse = QPushButton("Обзор")
-        tree_browse.setStyleSheet(StyleHelper.get_button_style())
-        tree_browse.clicked.connect(self.choose_tree_file)
-        tree_layout.addWidget(QLabel("Файл дерева:"))
-        tree_layout.addWidget(self.tree_file)
-        tree_layout.addWidget(tree_browse)
-
         files_layout.addLayout(input_layout)
-        files_layout.addLayout(tree_layout)
         files_group.setLayout(files_layout)
 
         # Группа для действий
@@ -266,7 +1075,26 @@ class HuffmanGUI(QMainWindow):
         process_button.clicked.connect(self.perform_action)
         visualize_button.clicked.connect(self.visualize_tree)
 
+        # Текстовый формат '0'/'1' — только для отладки, по умолчанию двоичный контейнер
+        self.text_format_check = QCheckBox("Текстовый формат (отладка)")
+        # Адаптивный код: один проход, без подсчета частот заранее
+        self.adaptive_check = QCheckBox("Адаптивный код")
+
+        # Алфавит двоичного кодирования: байты (потоковое кодирование) или токены
+        self.alphabet_combo = QComboBox()
+        self.alphabet_combo.setStyleSheet(StyleHelper.get_combo_box_style())
+        self.alphabet_combo.addItems(list(ALPHABETS))
+
+        # Ограничение длины кода: пусто — без ограничения
+        self.max_length_edit = QLineEdit()
+        self.max_length_edit.setStyleSheet(StyleHelper.get_line_edit_style())
+        self.max_length_edit.setPlaceholderText("Макс. длина кода")
+
         actions_layout.addWidget(self.action_combo)
+        actions_layout.addWidget(self.alphabet_combo)
+        actions_layout.addWidget(self.max_length_edit)
+        actions_layout.addWidget(self.text_format_check)
+        actions_layout.addWidget(self.adaptive_check)
         actions_layout.addWidget(process_button)
         actions_layout.addWidget(visualize_button)
         actions_group.setLayout(actions_layout)
@@ -304,16 +1132,6 @@ class HuffmanGUI(QMainWindow):
         if filename:
             self.input_file.setText(filename)
 
-    def choose_tree_file(self):
-        filename, _ = QFileDialog.getOpenFileName(
-            self,
-            "Выберите файл дерева",
-            "",
-            "Huffman Tree files (*.pkl);;All files (*.*)"
-        )
-        if filename:
-            self.tree_file.setText(filename)
-
     def show_error(self, message):
         QMessageBox.critical(self, "Ошибка", message)
 
@@ -328,12 +1146,10 @@ class HuffmanGUI(QMainWindow):
         probability = node.freq  # Используем сохраненную вероятность напрямую
 
         if node.char is not None:
-            if node.char == ' ':
-                label = f"ПРОБЕЛ\np={probability:.3f}\nКод: {node.code}"
-            elif node.char == '\n':
-                label = f"\\n\np={probability:.3f}\nКод: {node.code}"
-            else:
-                label = f"'{node.char}'\np={probability:.3f}\nКод: {node.code}"
+            char_display = symbol_display(node.char)
+            if len(char_display) == 1:
+                char_display = f"'{char_display}'"  # Обычный символ — в кавычках
+            label = f"{char_display}\np={probability:.3f}\nКод: {node.code}"
         else:
             label = f"p={probability:.3f}"
 
@@ -380,17 +1196,17 @@ class HuffmanGUI(QMainWindow):
         return _hierarchy_pos(G, root, width=2., vert_gap=0.4)
 
     def visualize_tree(self):
-        tree_filename = self.tree_file.text()
-        if not tree_filename:
-            self.show_error("Выберите файл дерева Хаффмана")
+        # Дерево восстанавливается по заголовку закодированного файла
+        filename = self.input_file.text()
+        if not filename:
+            self.show_error("Выберите закодированный файл")
             return
 
         try:
-            with open(tree_filename, 'rb') as tree_file:
-                tree = pickle.load(tree_file)
+            with open(filename, 'rb') as encoded_file:
+                tree = read_encoded_tree(encoded_file.read())
 
-            huffman_codes = generate_huffman_codes(tree)
-            table = format_huffman_codes(huffman_codes)
+            table = format_huffman_codes(tree.codes)
             self.results_browser.setText(table)
 
             G = nx.Graph()
@@ -438,6 +1254,16 @@ class HuffmanGUI(QMainWindow):
             self.show_error("Выберите файл")
             return
 
+        try:
+            max_length = int(self.max_length_edit.text()) if self.max_length_edit.text().strip() else None
+        except ValueError:
+            self.show_error("Максимальная длина кода должна быть целым числом")
+            return
+
+        if not self.text_format_check.isChecked() or self.adaptive_check.isChecked():
+            self.perform_binary_action(filename, max_length)
+            return
+
         try:
             with open(filename, 'r', encoding='utf-8') as file:
                 text = file.read()
@@ -450,35 +1276,24 @@ class HuffmanGUI(QMainWindow):
 
         try:
             if action == "Кодировать":
-                encoded_text, tree = huffman_encode(text)
-                huffman_codes = generate_huffman_codes(tree)
-                table = format_huffman_codes(huffman_codes)
+                encoded_text, tree = huffman_encode(text, max_length)
+                table = format_huffman_codes(tree.codes)
+                if max_length is not None and text:
+                    table += "\n\n" + length_limit_report(Counter(text), max_length)
                 self.results_browser.setText(table)
 
-                # Сохранение файлов
+                # Первая строка — длины канонических кодов, вторая — закодированный текст
                 output_file = f"{base_name}_encoded{file_extension}"
-                tree_file = f"{base_name}_tree.pkl"
-
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(encoded_text)
-                with open(tree_file, 'wb') as f:
-                    pickle.dump(tree, f)
+                    f.write(format_lengths_line(code_lengths(tree)) + "\n" + encoded_text)
 
-                self.show_success(
-                    f"Файл закодирован: {output_file}\n"
-                    f"Дерево сохранено: {tree_file}"
-                )
+                self.show_success(f"Файл закодирован: {output_file}")
 
             else:  # Декодирование
-                tree_filename = self.tree_file.text()
-                if not tree_filename:
-                    self.show_error("Выберите файл дерева")
-                    return
+                header, _, encoded_text = text.partition("\n")
+                tree = build_code_tree(canonical_codes(parse_lengths_line(header)))
 
-                with open(tree_filename, 'rb') as f:
-                    tree = pickle.load(f)
-
-                decoded_text = huffman_decode(text, tree)
+                decoded_text = huffman_decode(encoded_text, tree)
                 output_file = f"{base_name}_decoded{file_extension}"
 
                 with open(output_file, 'w', encoding='utf-8') as f:
@@ -489,6 +1304,74 @@ class HuffmanGUI(QMainWindow):
         except Exception as e:
             self.show_error(f"Ошибка при обработке: {str(e)}")
 
+    def perform_binary_action(self, filename, max_length=None):
+        # Файл обрабатывается как байты, таблица кодов хранится в самом контейнере
+        action = self.action_combo.currentText()
+
+        try:
+            if action == "Кодировать" and self.adaptive_check.isChecked():
+                # Адаптивный код: один проход, подходит и для потоков без известной длины
+                output_file = f"{filename}.ahuffman"
+                with open(filename, 'rb') as source, open(output_file, 'wb') as output:
+                    adaptive_encode_stream(source, output)
+                self.show_success(f"Файл закодирован: {output_file}\n"
+                                  f"Размер: {os.path.getsize(filename)} -> {os.path.getsize(output_file)} байт")
+
+            elif action == "Кодировать" and ALPHABETS[self.alphabet_combo.currentText()]:
+                # Алфавит токенов: файл читается целиком, алфавит пишется в заголовок
+                tokenizer = ALPHABETS[self.alphabet_combo.currentText()]
+                output_file = f"{filename}.thuffman"
+                with open(filename, 'rb') as file:
+                    data = file.read()
+                start = time.perf_counter()
+                encoded, tree = tokenized_encode_bytes(data, tokenizer, max_length)
+                elapsed = time.perf_counter() - start
+                with open(output_file, 'wb') as f:
+                    f.write(encoded)
+
+                if tree is not None:
+                    self.results_browser.setText(format_huffman_codes(tree.codes))
+                self.show_success(f"Файл закодирован: {output_file}\n"
+                                  f"Размер: {len(data)} -> {len(encoded)} байт "
+                                  f"(степень сжатия {len(data) / len(encoded):.2f})\n"
+                                  f"Скорость: {len(data) / 1e6 / max(elapsed, 1e-9):.2f} МБ/с")
+
+            elif action == "Кодировать":
+                # Потоковое кодирование в два прохода: файл целиком в память не читается
+                output_file = f"{filename}.huffman"
+                tree, frequency = huffman_encode_file(filename, output_file, max_length)
+
+                if tree is not None:
+                    table = format_huffman_codes(tree.codes)
+                    if max_length is not None:
+                        table += "\n\n" + length_limit_report(frequency, max_length)
+                    self.results_browser.setText(table)
+                self.show_success(f"Файл закодирован: {output_file}\n"
+                                  f"Размер: {os.path.getsize(filename)} -> {os.path.getsize(output_file)} байт")
+
+            else:  # Декодирование
+                # file.txt.huffman -> file_decoded.txt
+                base_name, file_extension = os.path.splitext(os.path.splitext(filename)[0])
+                output_file = f"{base_name}_decoded{file_extension}"
+                with open(filename, 'rb') as file:
+                    magic = file.read(len(ADAPTIVE_MAGIC))
+                if magic == ADAPTIVE_MAGIC:
+                    # Поток адаптивного кода декодируется по порциям
+                    with open(filename, 'rb') as source, open(output_file, 'wb') as output:
+                        adaptive_decode_stream(source, output)
+                else:
+                    # Вид контейнера определяется по сигнатуре
+                    decode = tokenized_decode_bytes if magic == TOKEN_MAGIC else huffman_decode_bytes
+                    with open(filename, 'rb') as file:
+                        decoded = decode(file.read())
+                    with open(output_file, 'wb') as f:
+                        f.write(decoded)
+
+                self.show_success(f"Файл декодирован: {output_file}")
+
+        except Exception as e:
+            self.show_error(f"Ошибка при обработке: {str(e)}")
+
 
 def main():
     app = QApplication(sys.argv)
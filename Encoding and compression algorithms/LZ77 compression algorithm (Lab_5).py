@@ -1,110 +1,1276 @@
+import heapq
+import io
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter.ttk import Progressbar
-from bitarray import bitarray
+
+class HashChainMatchFinder:
+    """
+    Поиск совпадений по хеш-цепочкам (head + prev), ключ — первые 3 байта.
+
+    Для каждого ключа хранится последняя позиция его появления (head),
+    а для каждой позиции — предыдущая позиция с тем же ключом (prev).
+    Совпадения длиной 2 байта ищутся по отдельной цепочке с 2-байтовым ключом.
+    При неограниченной глубине цепочки (chain_depth=None) и prefer_farthest=True
+    результат совпадает с LZ77Compressor.find_longest_match: самое длинное
+    совпадение, а среди равных по длине — самое дальнее. При prefer_farthest=False
+    выбирается ближайшее, а обход цепочки прекращается на совпадении
+    максимальной длины.
+
+    Позиции в цепочках абсолютные: data[0] соответствует позиции offset,
+    что позволяет потоковому сжатию отбрасывать начало буфера.
+    """
+    def __init__(self, window_size, lookahead_buffer_size, chain_depth=None, min_match=2, prefer_farthest=True):
+        self.window_size = window_size
+        self.lookahead_buffer_size = lookahead_buffer_size
+        self.chain_depth = chain_depth  # Максимальное число просматриваемых кандидатов
+        self.min_match = min_match  # Минимальная длина совпадения (2 или 3)
+        self.prefer_farthest = prefer_farthest  # Выбор среди совпадений равной длины
+        self.head3 = {}  # Последняя позиция для каждого 3-байтового ключа
+        self.prev3 = {}  # Предыдущая позиция с тем же 3-байтовым ключом
+        self.head2 = {}  # То же для 2-байтовых ключей
+        self.prev2 = {}
+        self.next_position = 0  # Первая позиция, еще не добавленная в цепочки
+        self.offset = 0  # Абсолютная позиция первого байта буфера data
+
+    def insert_until(self, data, position):
+        """
+        Добавляет в цепочки все позиции, предшествующие position (абсолютной).
+        """
+        head3, prev3, head2, prev2 = self.head3, self.prev3, self.head2, self.prev2
+        offset = self.offset
+        end = len(data) + offset
+        window_start = position - self.window_size
+        for i in range(self.next_position, position):
+            j = i - offset
+            if i + 2 <= end:
+                key = (data[j] << 8) | data[j + 1]
+                prev2[i] = head2.get(key, -1)
+                head2[key] = i
+                if i + 3 <= end:
+                    key = (key << 8) | data[j + 2]
+                    prev3[i] = head3.get(key, -1)
+                    head3[key] = i
+        self.next_position = max(self.next_position, position)
+
+        # Удаляем ссылки на позиции, вышедшие за пределы окна
+        if len(prev2) > 4 * self.window_size + 1024:
+            self.prev3 = {i: p for i, p in prev3.items() if i >= window_start}
+            self.prev2 = {i: p for i, p in prev2.items() if i >= window_start}
+            self.head3 = {key: i for key, i in head3.items() if i >= window_start}
+            self.head2 = {key: i for key, i in head2.items() if i >= window_start}
+
+    def find(self, data, current_position):
+        """
+        Поиск самой длинной подстроки в окне по хеш-цепочкам.
+        """
+        position = current_position + self.offset
+        self.insert_until(data, position)
+
+        # Как и в find_longest_match, длина совпадения от min_match до lookahead_buffer_size - 1
+        max_length = min(self.lookahead_buffer_size - 1, len(data) - current_position)
+        if max_length < self.min_match:
+            return None
+
+        window_start = position - self.window_size
+        best_match_distance = -1
+        best_match_length = -1
+        key = (data[current_position] << 8) | data[current_position + 1]
+
+        # Совпадения длиной от 3 байт
+        if max_length >= 3:
+            best_match_distance, best_match_length = self._walk_chain(
+                data, current_position, max_length, window_start,
+                self.head3.get((key << 8) | data[current_position + 2], -1), self.prev3, 3)
+
+        # Совпадения длиной 2 байта, если длиннее ничего не нашлось
+        if best_match_length < 3 and self.min_match <= 2:
+            best_match_distance, best_match_length = self._walk_chain(
+                data, current_position, 2, window_start, self.head2.get(key, -1), self.prev2, 2)
+
+        if best_match_distance > 0 and best_match_length > 0:
+            return best_match_distance, best_match_length
+        return None
+
+    def _walk_chain(self, data, current_position, max_length, window_start, candidate, prev, key_length):
+        """
+        Обход цепочки от ближайшего кандидата к самому дальнему в пределах окна.
+        """
+        best_match_distance = -1
+        best_match_length = -1
+        depth = self.chain_depth
+        prefer_farthest = self.prefer_farthest
+        offset = self.offset
+
+        while candidate >= 0 and candidate >= window_start:
+            if depth is not None:
+                if depth <= 0:
+                    break
+                depth -= 1
+
+            start = candidate - offset  # Позиция кандидата в буфере
+            # Быстрая проверка: кандидат должен дотягивать хотя бы до текущей лучшей длины
+            if best_match_length < 0 or data[start + best_match_length - 1] == data[current_position + best_match_length - 1]:
+                length = key_length
+                # Длинные совпадения сравниваем срезами по 32 байта, остаток — побайтно
+                while length + 32 <= max_length and \
+                        data[start + length:start + length + 32] == data[current_position + length:current_position + length + 32]:
+                    length += 32
+                while length < max_length and data[start + length] == data[current_position + length]:
+                    length += 1
+                if length > best_match_length or (prefer_farthest and length == best_match_length):
+                    best_match_distance = current_position - start
+                    best_match_length = length
+                    # Длиннее найти нельзя, а ближайшее совпадение уже выбрано
+                    if length == max_length and not prefer_farthest:
+                        break
+
+            candidate = prev[candidate]
+
+        return best_match_distance, best_match_length
+
+
+def build_suffix_array(data, lcp_limit):
+    """
+    Суффиксный массив, обратный к нему массив и массив LCP, где lcp[r] —
+    длина общего префикса суффиксов suffix_array[r - 1] и suffix_array[r],
+    но не больше lcp_limit.
+
+    Суффиксы упорядочиваются удвоением префиксов только до длины lcp_limit:
+    более длинные совпадения не нужны, а суффиксы с равным префиксом
+    остаются в порядке позиций.
+    """
+    n = len(data)
+    if n == 0:
+        return [], [], []
+
+    # Начальные ключи — первые 3 байта; за концом данных 0, чтобы короткий суффикс был меньше
+    padded = [b + 1 for b in data] + [0, 0]
+    keys = [(padded[i] << 18) | (padded[i + 1] << 9) | padded[i + 2] for i in range(n)]
+    step = 3
+
+    while True:
+        # Ранг — номер ключа среди различных ключей по возрастанию
+        labels = {key: label for label, key in enumerate(sorted(set(keys)))}
+        rank = [labels[key] for key in keys]
+        if len(labels) == n or step >= lcp_limit:
+            break
+
+        # Ключ — пара (ранг суффикса, ранг суффикса через step позиций)
+        second = [r + 1 for r in rank[step:]] + [0] * step
+        keys = [r * (n + 1) + t for r, t in zip(rank, second)]
+        step *= 2
+
+    suffix_array = sorted(range(n), key=rank.__getitem__)
+    inverse = [0] * n
+    for r, i in enumerate(suffix_array):
+        inverse[i] = r
+
+    # Алгоритм Касаи; при неполной сортировке подсказка h проверяется сравнением срезов
+    lcp = [0] * n
+    h = 0
+    for i in range(n):
+        r = inverse[i]
+        if r == 0:
+            h = 0
+            continue
+        j = suffix_array[r - 1]
+        if h and data[i:i + h] != data[j:j + h]:
+            h = 0
+        while h < lcp_limit and i + h < n and j + h < n and data[i + h] == data[j + h]:
+            h += 1
+        lcp[r] = h
+        if h:
+            h -= 1
+    return suffix_array, inverse, lcp
+
+
+class SuffixArrayMatchFinder:
+    """
+    Поиск совпадений по суффиксному массиву с LCP для больших окон.
+
+    Индекс строится один раз на блок: по окну перед позицией, блоку
+    из block_size позиций и буферу предварительного просмотра за ним.
+    Кандидаты — соседи позиции в суффиксном массиве; длина совпадения
+    равна минимуму LCP на пути к соседу, поэтому обход в каждую сторону
+    прекращается, как только этот минимум становится меньше лучшей длины.
+    scan_limit ограничивает число просматриваемых соседей.
+    """
+    DEFAULT_SCAN_LIMIT = 256
+    MIN_BLOCK_SIZE = 1 << 18
+
+    def __init__(self, window_size, lookahead_buffer_size, scan_limit=None, min_match=2, prefer_farthest=True,
+                 block_size=None):
+        self.window_size = window_size
+        self.lookahead_buffer_size = lookahead_buffer_size
+        self.scan_limit = scan_limit or self.DEFAULT_SCAN_LIMIT
+        self.min_match = min_match
+        self.prefer_farthest = prefer_farthest
+        self.block_size = block_size or max(window_size, self.MIN_BLOCK_SIZE)
+        self.offset = 0  # Абсолютная позиция первого байта буфера data
+        self.index_start = 0  # Абсолютная позиция, с которой начинается индекс
+        self.served_end = 0  # Позиции до served_end обслуживаются текущим индексом
+        self.suffix_array, self.rank, self.lcp = [], [], []
+
+    def rebuild(self, data, current_position):
+        """
+        Строит индекс для блока, начинающегося с current_position.
+        """
+        low = max(0, current_position - self.window_size)
+        high = min(len(data), current_position + self.block_size + self.lookahead_buffer_size)
+        self.suffix_array, self.rank, self.lcp = build_suffix_array(bytes(data[low:high]),
+                                                                    self.lookahead_buffer_size)
+        self.index_start = low + self.offset
+        self.served_end = current_position + self.offset + self.block_size
+
+    def find(self, data, current_position):
+        """
+        Поиск самой длинной подстроки в окне по суффиксному массиву.
+        """
+        position = current_position + self.offset
+        if position >= self.served_end:
+            self.rebuild(data, current_position)
+
+        max_length = min(self.lookahead_buffer_size - 1, len(data) - current_position)
+        if max_length < self.min_match:
+            return None
+
+        suffix_array, lcp = self.suffix_array, self.lcp
+        index = position - self.index_start  # Позиция в индексе
+        window_start = index - self.window_size
+        rank = self.rank[index]
+        best_match_length = self.min_match - 1
+        best_candidate = -1
+        steps = self.scan_limit
+
+        for direction in (-1, 1):
+            common = max_length  # Минимум LCP на пути от позиции до соседа
+            r = rank
+            while steps > 0:
+                if direction < 0:
+                    if r == 0:
+                        break
+                    common = min(common, lcp[r])
+                    r -= 1
+                else:
+                    r += 1
+                    if r >= len(suffix_array):
+                        break
+                    common = min(common, lcp[r])
+                if common < best_match_length or common < self.min_match:
+                    break  # Дальше совпадения только короче
+                steps -= 1
+
+                candidate = suffix_array[r]
+                if window_start <= candidate < index:
+                    if common > best_match_length or (
+                            common == best_match_length and best_candidate >= 0 and
+                            (candidate < best_candidate) == self.prefer_farthest):
+                        best_match_length = common
+                        best_candidate = candidate
+
+        if best_candidate >= 0:
+            return index - best_candidate, best_match_length
+        return None
+
+
+class BitWriter:
+    """
+    Запись битовых полей через целочисленный аккумулятор.
+    Готовые байты накапливаются в буфере и забираются методом take_bytes.
+    """
+    def __init__(self):
+        self.accumulator = 0  # Еще не записанные в буфер биты
+        self.bit_count = 0  # Количество бит в аккумуляторе
+        self.buffer = bytearray()  # Готовые байты
+
+    def write(self, value, bits):
+        """
+        Добавляет bits младших бит значения value (старшим битом вперед).
+        """
+        self.accumulator = (self.accumulator << bits) | value
+        self.bit_count += bits
+        if self.bit_count >= 64:
+            self._move_whole_bytes()
+
+    def _move_whole_bytes(self):
+        """
+        Переносит целые байты из аккумулятора в буфер.
+        """
+        extra = self.bit_count & 7
+        self.buffer += (self.accumulator >> extra).to_bytes(self.bit_count >> 3, 'big')
+        self.accumulator &= (1 << extra) - 1
+        self.bit_count = extra
+
+    def take_bytes(self):
+        """
+        Возвращает накопленные целые байты и очищает буфер.
+        """
+        self._move_whole_bytes()
+        result = bytes(self.buffer)
+        self.buffer.clear()
+        return result
+
+    def flush(self):
+        """
+        Дополняет последний байт нулями и возвращает оставшиеся байты.
+        """
+        if self.bit_count & 7:
+            self.write(0, 8 - (self.bit_count & 7))
+        return self.take_bytes()
+
+
+class RawTokenWriter:
+    """
+    Запись токенов как есть: флаг 0 и байт литерала или флаг 1,
+    расстояние и длина совпадения в полях фиксированной ширины.
+    """
+    def __init__(self, layout):
+        self.writer = BitWriter()
+        self.write = self.writer.write
+        self.distance_bits, self.length_bits, self.distance_bias, self.length_bias = layout
+        self.match_flag = 1 << (self.distance_bits + self.length_bits)
+        self.match_bits = 1 + self.distance_bits + self.length_bits
+
+    def literal(self, byte):
+        self.write(byte, 9)
+
+    def match(self, distance, length):
+        self.write(self.match_flag | ((distance - self.distance_bias) << self.length_bits)
+                   | (length - self.length_bias), self.match_bits)
+
+    def take_bytes(self):
+        return self.writer.take_bytes()
+
+    def flush(self):
+        return self.writer.flush()
+
+
+class HuffmanTokenWriter:
+    """
+    Энтропийное кодирование токенов, как в deflate: литералы, конец блока
+    и коды длин составляют один алфавит Хаффмана, коды расстояний — другой.
+
+    Токены накапливаются блоками по BLOCK_TOKENS. Блок начинается с числа
+    символов обоих алфавитов (9 и 6 бит) и длин канонических кодов (по 4 бита),
+    затем идут токены и символ конца блока. Блок выравнивается по байту
+    и предваряется размером (ENTROPY_FRAME); размер 0 завершает поток.
+    """
+    BLOCK_TOKENS = 1 << 15
+
+    def __init__(self, layout):
+        _, _, self.distance_bias, self.length_bias = layout
+        self.tokens = []  # Литерал — байт, совпадение — (длина, расстояние)
+        self.output = bytearray()
+
+    def literal(self, byte):
+        self.tokens.append(byte)
+        if len(self.tokens) >= self.BLOCK_TOKENS:
+            self._write_block()
+
+    def match(self, distance, length):
+        self.tokens.append((length, distance))
+        if len(self.tokens) >= self.BLOCK_TOKENS:
+            self._write_block()
+
+    def take_bytes(self):
+        result = bytes(self.output)
+        self.output.clear()
+        return result
+
+    def flush(self):
+        if self.tokens:
+            self._write_block()
+        self.output += LZ77Compressor.ENTROPY_FRAME.pack(0)
+        return self.take_bytes()
+
+    def _write_block(self):
+        """
+        Строит коды по частотам накопленных токенов и записывает блок.
+        """
+        literal_frequencies = [0] * (END_OF_BLOCK + 1 + len(VALUE_BASE))
+        distance_frequencies = [0] * len(VALUE_BASE)
+        literal_frequencies[END_OF_BLOCK] = 1
+        symbols = []  # (символ, доп. биты длины, их число, код расстояния, доп. биты, их число)
+        for token in self.tokens:
+            if token.__class__ is int:
+                literal_frequencies[token] += 1
+                symbols.append(token)
+                continue
+            length, distance = token
+            length_code, length_extra_bits, length_extra = value_code(length - self.length_bias)
+            distance_code, distance_extra_bits, distance_extra = value_code(distance - self.distance_bias)
+            literal_frequencies[END_OF_BLOCK + 1 + length_code] += 1
+            distance_frequencies[distance_code] += 1
+            symbols.append((END_OF_BLOCK + 1 + length_code, length_extra, length_extra_bits,
+                            distance_code, distance_extra, distance_extra_bits))
+        self.tokens.clear()
+
+        # Хвост из неиспользуемых символов не записывается
+        literal_lengths = huffman_code_lengths(literal_frequencies)
+        distance_lengths = huffman_code_lengths(distance_frequencies)
+        literal_count = max(symbol for symbol, length in enumerate(literal_lengths) if length) + 1
+        distance_count = max((symbol for symbol, length in enumerate(distance_lengths) if length), default=-1) + 1
+        literal_codes = canonical_codes(literal_lengths)
+        distance_codes = canonical_codes(distance_lengths)
+
+        writer = BitWriter()
+        write = writer.write
+        write(literal_count, 9)
+        write(distance_count, 6)
+        for length in literal_lengths[:literal_count] + distance_lengths[:distance_count]:
+            write(length, 4)
+
+        for symbol in symbols:
+            if symbol.__class__ is int:
+                write(literal_codes[symbol], literal_lengths[symbol])
+                continue
+            length_symbol, length_extra, length_extra_bits, distance_code, distance_extra, distance_extra_bits = symbol
+            write((literal_codes[length_symbol] << length_extra_bits) | length_extra,
+                  literal_lengths[length_symbol] + length_extra_bits)
+            write((distance_codes[distance_code] << distance_extra_bits) | distance_extra,
+                  distance_lengths[distance_code] + distance_extra_bits)
+        write(literal_codes[END_OF_BLOCK], literal_lengths[END_OF_BLOCK])
+
+        body = writer.flush()
+        self.output += LZ77Compressor.ENTROPY_FRAME.pack(len(body)) + body
+
+
+def decode_tokens(padded, position, total_bits, output_buffer, output_position, layout):
+    """
+    Декодирует токены LZ77 начиная с бита position, пока хватает бит.
+
+    padded — входные байты, дополненные 8 нулевыми байтами (чтобы всегда
+    можно было прочитать 8 байт вокруг курсора); total_bits — число значащих бит.
+    Результат пишется в output_buffer начиная с output_position; буфер
+    расширяется при нехватке места. Незавершенный токен в конце входа
+    не декодируется. Возвращает новые позиции курсора и записи.
+    """
+    distance_bits, length_bits, distance_bias, length_bias = layout
+    match_bits = distance_bits + length_bits
+    match_mask = (1 << match_bits) - 1
+    length_mask = (1 << length_bits) - 1
+    max_length = length_mask + length_bias
+    # Маски для 64-битного окна в зависимости от смещения курсора внутри байта
+    window_masks = [(1 << (64 - shift)) - 1 for shift in range(8)]
+    capacity = len(output_buffer)
+
+    # Основной цикл обработки данных
+    while total_bits - position >= 9:  # Минимум 9 бит для обработки (1 бит флага и 8 бит данных)
+        byte_position = position >> 3
+        shift = position & 7
+        available = 64 - shift  # Сколько бит окна относятся к токену и следующим за ним
+        window = int.from_bytes(padded[byte_position:byte_position + 8], 'big') & window_masks[shift]
+
+        if output_position + max_length > capacity:
+            # Запас в max_length байт позволяет не проверять границы при каждой копии
+            output_buffer.extend(bytes(max(capacity, max_length)))
+            capacity = len(output_buffer)
+
+        if not window >> (available - 1):
+            # Если флаг равен 0, читаем 8 бит символа
+            output_buffer[output_position] = (window >> (available - 9)) & 0xFF
+            output_position += 1
+            position += 9
+        else:
+            if total_bits - position < 1 + match_bits:
+                break  # Токен пришел не полностью
+
+            # Если флаг равен 1, читаем расстояние и длину
+            field = (window >> (available - 1 - match_bits)) & match_mask
+            distance = (field >> length_bits) + distance_bias  # Восстанавливаем расстояние
+            length = (field & length_mask) + length_bias  # Восстанавливаем длину
+            position += 1 + match_bits
+
+            source = output_position - distance
+            if source < 0:
+                raise ValueError("Файл поврежден: ссылка за пределы распакованных данных.")
+            if distance >= length:
+                output_buffer[output_position:output_position + length] = \
+                    output_buffer[source:source + length]
+            else:
+                # Перекрывающаяся копия: повторяем период длиной distance
+                pattern = output_buffer[source:output_position]
+                repetitions, last = divmod(length, distance)
+                output_buffer[output_position:output_position + length] = \
+                    pattern * repetitions + pattern[:last]
+            output_position += length
+
+    return position, output_position
+
+def decode_tokens_vectorized(data, position, layout, dictionary=b"", group_size=1 << 12):
+    """
+    Векторизованное (NumPy) декодирование потока токенов LZ77 начиная с бита position.
+
+    Границы токенов зависят от их флагов, поэтому начала токенов находятся
+    коротким циклом по распакованным битам флагов (9 бит для литерала,
+    1 + поля для совпадения). Остальное выполняется сразу для всех токенов:
+    поля извлекаются из 64-битных окон, как в decode_tokens, а для каждого
+    байта результата вычисляется, откуда он копируется (байт литерала — сам
+    из себя, байт перекрывающейся копии — из первого периода). Ссылки
+    разрешаются удвоением source = source[source] группами по group_size
+    байт результата: ссылки в предыдущие группы уже разрешены.
+    Возвращает (позицию курсора в битах, распакованные байты без словаря).
+    NumPy импортируется здесь: остальной модуль обходится стандартной библиотекой.
+    """
+    import numpy as np
+
+    distance_bits, length_bits, distance_bias, length_bias = layout
+    match_bits = distance_bits + length_bits
+    total_bits = len(data) * 8
+    padded = np.frombuffer(bytes(data) + bytes(8), dtype=np.uint8)
+
+    # Начала токенов; незавершенный токен в конце входа не декодируется
+    flags = np.unpackbits(padded).tobytes()
+    token_sizes = (9, 1 + match_bits)
+    starts = []
+    append = starts.append
+    while total_bits - position >= 9:
+        size = token_sizes[flags[position]]
+        if total_bits - position < size:
+            break
+        append(position)
+        position += size
+    starts = np.array(starts, dtype=np.int64)
+
+    # Поля всех токенов из 64-битного окна вокруг каждого токена
+    windows = padded[(starts >> 3)[:, None] + np.arange(8)].view('>u8').ravel()
+    shifts = (starts & 7).astype(np.uint64)
+    is_match = np.frombuffer(flags, dtype=np.uint8)[starts].astype(bool)
+    literals = ((windows >> (np.uint64(55) - shifts)) & np.uint64(0xFF)).astype(np.uint8)
+    fields = (windows >> (np.uint64(63 - match_bits) - shifts)).astype(np.int64) & ((1 << match_bits) - 1)
+    lengths = np.where(is_match, (fields & ((1 << length_bits) - 1)) + length_bias, 1)
+    distances = np.where(is_match, (fields >> length_bits) + distance_bias, 0)
+    if np.any(distances[is_match] < 1):
+        raise ValueError("Файл поврежден: нулевое расстояние совпадения.")
+
+    # Позиции токенов в результате; словарь стоит перед результатом
+    ends = len(dictionary) + np.cumsum(lengths)
+    output_starts = ends - lengths
+    output = np.zeros(int(ends[-1]) if len(ends) else len(dictionary), dtype=np.uint8)
+    output[:len(dictionary)] = np.frombuffer(bytes(dictionary), dtype=np.uint8)
+    output[output_starts[~is_match]] = literals[~is_match]
+
+    # Группы токенов примерно по group_size байт результата
+    boundaries = np.searchsorted(ends, np.arange(len(dictionary) + group_size, len(output), group_size), 'right')
+    group_starts = np.unique(np.concatenate(([0], boundaries, [len(starts)])))
+    for first, last in zip(group_starts[:-1], group_starts[1:]):
+        start = int(output_starts[first])
+        group_lengths = lengths[first:last]
+        byte_distances = np.repeat(distances[first:last], group_lengths)
+        byte_starts = np.repeat(output_starts[first:last], group_lengths)
+        offsets = np.arange(start, start + len(byte_starts)) - byte_starts
+        source = byte_starts - byte_distances + offsets % np.maximum(byte_distances, 1)
+        if len(source) and source.min() < 0:
+            raise ValueError("Файл поврежден: ссылка за пределы распакованных данных.")
+
+        is_literal = byte_distances == 0  # Байт литерала ссылается сам на себя
+        pending = np.flatnonzero(source >= start)
+        while len(pending):
+            pending = pending[~is_literal[source[pending] - start]]
+            source[pending] = source[source[pending] - start]
+            pending = pending[source[pending] >= start]
+        output[start:start + len(source)] = output[source]
+
+    return position, output[len(dictionary):].tobytes()
+
+
+# Коды значений (длин и расстояний) для энтропийного кодирования: значения 0–3
+# имеют собственные коды, далее каждый диапазон [2^b, 2^(b+1)) делится на два
+# кода по следующему за старшим биту, остальные b - 1 бит пишутся как есть
+VALUE_BASE = list(range(4)) + [(2 | (code & 1)) << ((code >> 1) - 1) for code in range(4, 64)]
+VALUE_EXTRA_BITS = [0] * 4 + [(code >> 1) - 1 for code in range(4, 64)]
+MAX_CODE_BITS = 15  # Максимальная длина кода Хаффмана
+END_OF_BLOCK = 256  # Символ конца блока в алфавите литералов и длин
+
+
+def value_code(value):
+    """
+    Возвращает (код, число дополнительных бит, дополнительные биты) для значения.
+    """
+    if value < 4:
+        return value, 0, 0
+    top = value.bit_length() - 1
+    extra_bits = top - 1
+    return 2 * top + ((value >> extra_bits) & 1), extra_bits, value & ((1 << extra_bits) - 1)
+
+
+def huffman_code_lengths(frequencies, max_bits=MAX_CODE_BITS):
+    """
+    Длины кодов Хаффмана по частотам символов (0 — символ не встречается).
+    Если дерево получается глубже max_bits, частоты сглаживаются
+    и дерево строится заново.
+    """
+    lengths = [0] * len(frequencies)
+    weights = {symbol: frequency for symbol, frequency in enumerate(frequencies) if frequency}
+    if len(weights) == 1:
+        lengths[next(iter(weights))] = 1  # Единственному символу нужен хотя бы один бит
+        return lengths
+
+    while weights:
+        heap = [(weight, symbol) for symbol, weight in weights.items()]
+        heapq.heapify(heap)
+        parent = {}
+        node = len(frequencies)  # Внутренние узлы нумеруются после символов
+        while len(heap) > 1:
+            first_weight, first = heapq.heappop(heap)
+            second_weight, second = heapq.heappop(heap)
+            parent[first] = parent[second] = node
+            heapq.heappush(heap, (first_weight + second_weight, node))
+            node += 1
+
+        for symbol in weights:
+            depth = 0
+            current = symbol
+            while current in parent:
+                current = parent[current]
+                depth += 1
+            lengths[symbol] = depth
+        if max(lengths) <= max_bits:
+            break
+        weights = {symbol: (weight + 1) >> 1 for symbol, weight in weights.items()}
+    return lengths
+
+
+def canonical_codes(lengths):
+    """
+    Канонические коды по длинам: коды одной длины идут подряд в порядке символов.
+    """
+    codes = [0] * len(lengths)
+    code = 0
+    for length in range(1, max(lengths, default=0) + 1):
+        for symbol, symbol_length in enumerate(lengths):
+            if symbol_length == length:
+                if code >> length:
+                    raise ValueError("Файл поврежден: неверные длины кодов Хаффмана.")
+                codes[symbol] = code
+                code += 1
+        code <<= 1
+    return codes
+
+
+def build_decode_table(lengths):
+    """
+    Таблица декодирования: индекс — следующие max_bits бит потока,
+    значение — (символ << 4) | длина кода (0 — такого кода нет).
+    Возвращает (таблица, max_bits).
+    """
+    max_bits = max(max(lengths, default=0), 1)
+    table = [0] * (1 << max_bits)
+    for symbol, code in enumerate(canonical_codes(lengths)):
+        length = lengths[symbol]
+        if length:
+            span = 1 << (max_bits - length)
+            table[code * span:(code + 1) * span] = [(symbol << 4) | length] * span
+    return table, max_bits
+
+
+def decode_huffman_block(body, output_buffer, output_position, layout):
+    """
+    Декодирует один блок энтропийного кодирования (см. HuffmanTokenWriter).
+    Результат пишется в output_buffer начиная с output_position; буфер
+    расширяется при нехватке места. Возвращает новую позицию записи.
+    """
+    _, length_bits, distance_bias, length_bias = layout
+    max_length = (1 << length_bits) - 1 + length_bias
+    padded = bytes(body) + bytes(8)
+    total_bits = len(body) * 8
+
+    def read(position, bits):
+        byte_position = position >> 3
+        window = int.from_bytes(padded[byte_position:byte_position + 8], 'big')
+        return (window >> (64 - (position & 7) - bits)) & ((1 << bits) - 1)
+
+    # Заголовок блока: число символов в обоих алфавитах и длины их кодов по 4 бита
+    literal_count = read(0, 9)
+    distance_count = read(9, 6)
+    position = 15
+    code_lengths = [read(position + 4 * index, 4) for index in range(literal_count + distance_count)]
+    position += 4 * (literal_count + distance_count)
+    if literal_count <= END_OF_BLOCK or position > total_bits:
+        raise ValueError("Файл поврежден: неверный заголовок блока.")
+    literal_table, literal_bits = build_decode_table(code_lengths[:literal_count])
+    distance_table, distance_bits = build_decode_table(code_lengths[literal_count:])
+    capacity = len(output_buffer)
+
+    while True:
+        if position > total_bits:
+            raise ValueError("Файл поврежден: нет конца блока.")
+        entry = literal_table[read(position, literal_bits)]
+        if not entry & 15:
+            raise ValueError("Файл поврежден: неизвестный код Хаффмана.")
+        position += entry & 15
+        symbol = entry >> 4
+
+        if output_position + max_length > capacity:
+            # Запас в max_length байт позволяет не проверять границы при каждой копии
+            output_buffer.extend(bytes(max(capacity, max_length)))
+            capacity = len(output_buffer)
+
+        if symbol < END_OF_BLOCK:
+            output_buffer[output_position] = symbol
+            output_position += 1
+            continue
+        if symbol == END_OF_BLOCK:
+            break
+
+        code = symbol - END_OF_BLOCK - 1
+        extra_bits = VALUE_EXTRA_BITS[code]
+        length = VALUE_BASE[code] + read(position, extra_bits) + length_bias
+        position += extra_bits
+        entry = distance_table[read(position, distance_bits)]
+        if not entry & 15:
+            raise ValueError("Файл поврежден: неизвестный код Хаффмана.")
+        position += entry & 15
+        code = entry >> 4
+        extra_bits = VALUE_EXTRA_BITS[code]
+        distance = VALUE_BASE[code] + read(position, extra_bits) + distance_bias
+        position += extra_bits
+
+        source = output_position - distance
+        if source < 0 or length > max_length:
+            raise ValueError("Файл поврежден: ссылка за пределы распакованных данных.")
+        if distance >= length:
+            output_buffer[output_position:output_position + length] = output_buffer[source:source + length]
+        else:
+            # Перекрывающаяся копия: повторяем период длиной distance
+            pattern = output_buffer[source:output_position]
+            repetitions, last = divmod(length, distance)
+            output_buffer[output_position:output_position + length] = pattern * repetitions + pattern[:last]
+        output_position += length
+
+    return output_position
+
+
+def decode_huffman_frames(data, position, output_buffer, output_position, layout):
+    """
+    Декодирует полностью полученные блоки энтропийного кодирования,
+    начиная с байта position. Возвращает (позиция во входе, позиция записи,
+    признак конца потока).
+    """
+    frame = LZ77Compressor.ENTROPY_FRAME
+    while len(data) - position >= frame.size:
+        (body_size,) = frame.unpack_from(data, position)
+        if not body_size:
+            return position + frame.size, output_position, True
+        if len(data) - position - frame.size < body_size:
+            break  # Блок пришел не полностью
+        position += frame.size
+        output_position = decode_huffman_block(data[position:position + body_size],
+                                               output_buffer, output_position, layout)
+        position += body_size
+    return position, output_position, False
+
 
 class LZ77Compressor:
     """
     Класс, реализующий алгоритм сжатия и распаковки LZ77.
     """
     MAX_WINDOW_SIZE = 400  # Максимальный размер окна для алгоритма
+    MATCH_FINDERS = ("auto", "brute_force", "hash_chain", "suffix_array")  # Стратегии поиска совпадений
+    SUFFIX_ARRAY_THRESHOLD = 1 << 16  # При окне больше порога "auto" выбирает суффиксный массив
+    # Глубина хеш-цепочки нового формата по умолчанию: полный обход цепочки на
+    # повторяющихся данных стоит O(окна) на позицию. Старому формату нужен полный
+    # обход, чтобы совпадать с перебором; 0 — явный запрос полного обхода
+    DEFAULT_CHAIN_DEPTH = 256
+    UNLIMITED_CHAIN_DEPTH = 0
+
+    # Уровни разбора (выбора совпадений); формат результата от уровня не зависит
+    GREEDY_PARSE = 0  # Берется самое длинное совпадение в текущей позиции
+    LAZY_PARSE = 1  # Совпадение откладывается, если со следующей позиции оно длиннее
+    OPTIMAL_PARSE = 2  # Минимум бит на участке по модели стоимости токенов
+    OPTIMAL_SEGMENT = 4096  # Длина участка для оптимального разбора
+
+    # Форматы сжатого файла
+    LEGACY_FORMAT = 0  # Поток без заголовка: 12 бит расстояния, 4 бита длины
+    CONTAINER_FORMAT = 1  # Контейнер с заголовком и настраиваемой шириной полей
+    BLOCK_FORMAT = 2  # Контейнер из независимых блоков с таблицей смещений
+
+    # Заголовок контейнера: сигнатура, версия, биты окна, биты длины, флаги, исходный размер.
+    # Первый бит сигнатуры равен 1, а поток старого формата всегда начинается
+    # с литерала (флаг 0), поэтому форматы не спутать.
+    MAGIC = b"\x89LZ7"
+    HEADER = struct.Struct(">4sBBBBQ")
+    MAX_CONTAINER_WINDOW_SIZE = 1 << 20  # До 1 МиБ окна
+    MIN_LENGTH_BITS = 4
+    MAX_LENGTH_BITS = 16
+    CONTAINER_MIN_MATCH = 3  # Совпадения короче 3 байт дороже литералов
+    UNKNOWN_SIZE = 0xFFFFFFFFFFFFFFFF  # Исходный размер неизвестен (потоковое сжатие)
+    CHUNK_SIZE = 1 << 16  # Размер порции при потоковой обработке файлов
+
+    # Блочный формат: после заголовка — размер блока и число блоков, затем
+    # для каждого блока смещение от начала файла, сжатый и исходный размеры
+    BLOCK_TABLE = struct.Struct(">II")
+    BLOCK_ENTRY = struct.Struct(">QII")
+    DEFAULT_BLOCK_SIZE = 1 << 20
+    FLAG_PRIMED = 0x01  # Окно блока заполнено хвостом предыдущего блока
+
+    # Энтропийное кодирование токенов кодами Хаффмана (см. HuffmanTokenWriter)
+    FLAG_HUFFMAN = 0x02
+    ENTROPY_FRAME = struct.Struct(">I")  # Размер блока кодов Хаффмана
+
+    # Предварительный словарь заполняет окно перед сжатием;
+    # за заголовком тогда следует идентификатор словаря (CRC-32)
+    FLAG_DICTIONARY = 0x04
+    DICTIONARY_ID = struct.Struct(">I")
+
+    def __init__(self, window_size=20, match_finder="auto", chain_depth=None,
+                 format_version=LEGACY_FORMAT, length_bits=8, level=GREEDY_PARSE, entropy_coding=False):
+        self.format_version = format_version
+
+        if format_version == self.LEGACY_FORMAT:
+            # Инициализируем размер окна, ограничиваем его максимальным значением
+            self.window_size = min(window_size, self.MAX_WINDOW_SIZE)
+            self.lookahead_buffer_size = 15  # Размер буфера предварительного просмотра
+            self.min_match = 2
+            self.window_bits = 12
+            self.length_bits = 4
+        elif format_version == self.CONTAINER_FORMAT:
+            if not self.MIN_LENGTH_BITS <= length_bits <= self.MAX_LENGTH_BITS:
+                raise ValueError(f"Число бит длины должно быть от {self.MIN_LENGTH_BITS} до {self.MAX_LENGTH_BITS}.")
+            self.window_size = max(1, min(window_size, self.MAX_CONTAINER_WINDOW_SIZE))
+            self.min_match = self.CONTAINER_MIN_MATCH
+            # В поле хранится (расстояние - 1) и (длина - min_match)
+            self.window_bits = max(1, (self.window_size - 1).bit_length())
+            self.length_bits = length_bits
+            # Максимальная длина совпадения равна lookahead_buffer_size - 1 (при 8 битах — 258)
+            self.lookahead_buffer_size = self.min_match + (1 << length_bits)
+        else:
+            raise ValueError(f"Неизвестная версия формата: {format_version}")
+
+        if entropy_coding and format_version == self.LEGACY_FORMAT:
+            raise ValueError("Энтропийное кодирование доступно только для нового формата.")
+        self.entropy_coding = entropy_coding
+        self.dictionary_id = None  # Идентификатор словаря из заголовка сжатого файла
+
+        if match_finder not in self.MATCH_FINDERS:
+            raise ValueError(f"Неизвестная стратегия поиска совпадений: {match_finder}")
+        self.match_finder = match_finder
+        # Глубина хеш-цепочки или число соседей в суффиксном массиве. None — значение
+        # по умолчанию: без ограничения для старого формата, DEFAULT_CHAIN_DEPTH для нового
+        if chain_depth is None and format_version != self.LEGACY_FORMAT:
+            chain_depth = self.DEFAULT_CHAIN_DEPTH
+        self.chain_depth = chain_depth
+
+        if level not in (self.GREEDY_PARSE, self.LAZY_PARSE, self.OPTIMAL_PARSE):
+            raise ValueError(f"Неизвестный уровень разбора: {level}")
+        self.level = level
+
+    def create_match_finder(self):
+        """
+        Создает объект поиска совпадений или возвращает None для полного перебора.
+        """
+        match_finder = self.match_finder
+        if match_finder == "auto":
+            match_finder = "suffix_array" if self.window_size > self.SUFFIX_ARRAY_THRESHOLD else "hash_chain"
+        prefer_farthest = self.format_version == self.LEGACY_FORMAT
+        depth = None if self.chain_depth == self.UNLIMITED_CHAIN_DEPTH else self.chain_depth
+
+        if match_finder == "hash_chain":
+            return HashChainMatchFinder(self.window_size, self.lookahead_buffer_size, depth,
+                                        min_match=self.min_match, prefer_farthest=prefer_farthest)
+        if match_finder == "suffix_array":
+            return SuffixArrayMatchFinder(self.window_size, self.lookahead_buffer_size, depth,
+                                          min_match=self.min_match, prefer_farthest=prefer_farthest)
+        return None
+
+    def token_layout(self):
+        """
+        Возвращает параметры полей токена-совпадения:
+        (биты расстояния, биты длины, смещение расстояния, смещение длины).
+        """
+        if self.format_version == self.LEGACY_FORMAT:
+            return self.window_bits, self.length_bits, 0, 0
+        return self.window_bits, self.length_bits, 1, self.min_match
+
+    def settings(self):
+        """
+        Параметры конструктора — для создания такого же компрессора в другом процессе.
+        """
+        return dict(window_size=self.window_size, match_finder=self.match_finder,
+                    chain_depth=self.chain_depth, format_version=self.format_version,
+                    length_bits=self.length_bits, level=self.level, entropy_coding=self.entropy_coding)
+
+    def header(self, original_size=UNKNOWN_SIZE, version=None, flags=0, dictionary=b""):
+        """
+        Заголовок контейнера для текущих настроек (с идентификатором словаря, если он задан).
+        """
+        if version is None:
+            version = self.format_version
+        if self.entropy_coding:
+            flags |= self.FLAG_HUFFMAN
+        if dictionary:
+            flags |= self.FLAG_DICTIONARY
+        header = self.HEADER.pack(self.MAGIC, version, self.window_bits,
+                                  self.length_bits, flags, original_size)
+        if dictionary:
+            header += self.DICTIONARY_ID.pack(zlib.crc32(dictionary))
+        return header
+
+    def header_size(self):
+        """
+        Размер заголовка файла, из которого создан компрессор.
+        """
+        if self.dictionary_id is None:
+            return self.HEADER.size
+        return self.HEADER.size + self.DICTIONARY_ID.size
 
-    def __init__(self, window_size=20):
-        # Инициализируем размер окна, ограничиваем его максимальным значением
-        self.window_size = min(window_size, self.MAX_WINDOW_SIZE)
-        self.lookahead_buffer_size = 15  # Размер буфера предварительного просмотра
+    def check_dictionary(self, dictionary):
+        """
+        Сверяет словарь с идентификатором из заголовка и возвращает данные,
+        которыми заполняется окно (пустые, если файл сжат без словаря).
+        """
+        if self.dictionary_id is None:
+            return b""
+        if not dictionary:
+            raise ValueError("Файл сжат со словарем: укажите его для распаковки.")
+        if zlib.crc32(dictionary) != self.dictionary_id:
+            raise ValueError("Файл сжат с другим словарем.")
+        return bytes(dictionary[-(1 << self.window_bits):])
 
-    def compress(self, input_file_path, output_file_path=None):
+    @classmethod
+    def from_header(cls, header_bytes):
+        """
+        Создает компрессор с параметрами из заголовка контейнера.
+        """
+        if len(header_bytes) < cls.HEADER.size:
+            raise ValueError("Файл поврежден: неполный заголовок.")
+        magic, version, window_bits, length_bits, flags, original_size = cls.HEADER.unpack_from(header_bytes)
+        if magic != cls.MAGIC:
+            raise ValueError("Неверная сигнатура файла.")
+        if version not in (cls.CONTAINER_FORMAT, cls.BLOCK_FORMAT):
+            raise ValueError(f"Неподдерживаемая версия формата: {version}")
+        # Блоки используют те же токены, что и контейнер
+        compressor = cls(window_size=1 << window_bits, format_version=cls.CONTAINER_FORMAT,
+                         length_bits=length_bits, entropy_coding=bool(flags & cls.FLAG_HUFFMAN))
+        compressor.window_bits = window_bits
+        if flags & cls.FLAG_DICTIONARY:
+            if len(header_bytes) < cls.HEADER.size + cls.DICTIONARY_ID.size:
+                raise ValueError("Файл поврежден: неполный заголовок.")
+            (compressor.dictionary_id,) = cls.DICTIONARY_ID.unpack_from(header_bytes, cls.HEADER.size)
+        return compressor, original_size
+
+    def compress(self, input_file_path, output_file_path=None, dictionary=b""):
         """
         Метод сжатия файла с помощью алгоритма LZ77.
+        dictionary — предварительный словарь (см. train_dictionary).
         """
-        data = None  # Хранит прочитанные данные из файла
-        i = 0  # Указатель на текущую позицию в файле
-        output_buffer = bitarray(endian='big')  # Битовый массив для хранения сжатых данных
+        try:
+            input_file = open(input_file_path, 'rb')
+        except IOError:
+            raise IOError("Не удалось открыть файл для чтения.")
 
-        # Чтение данных из входного файла
+        with input_file:
+            original_size = os.fstat(input_file.fileno()).st_size
+            output_file = io.BytesIO()  # Без пути результат не сохраняется
+            if output_file_path:
+                try:
+                    output_file = open(output_file_path, 'wb')
+                except IOError:
+                    raise IOError("Не удалось записать файл для сохранения сжатых данных.")
+            with output_file:
+                self.compress_stream(input_file, output_file, original_size, dictionary)
+
+    def decompress(self, input_file_path, output_file_path=None, dictionary=b"", vectorized=False):
+        """
+        Метод для распаковки файла, сжатого с помощью LZ77.
+        dictionary — словарь, с которым файл был сжат; vectorized — читать файл
+        целиком и декодировать средствами NumPy (см. decompress_data).
+        """
         try:
-            with open(input_file_path, 'rb') as input_file:
-                data = input_file.read()
+            input_file = open(input_file_path, 'rb')
         except IOError:
             raise IOError("Не удалось открыть файл для чтения.")
 
-        # Основной цикл обработки данных
-        while i < len(data):
-            # Поиск наилучшего совпадения в окне
-            match = self.find_longest_match(data, i)
+        with input_file:
+            header = input_file.read(self.HEADER.size)
+            input_file.seek(0)
+            if header.startswith(self.MAGIC) and header[4] == self.BLOCK_FORMAT:
+                input_file.close()
+                self.decompress_blocks(input_file_path, output_file_path, dictionary=dictionary)
+                return
+            if vectorized:
+                result = self.decompress_data(input_file.read(), dictionary, vectorized=True)
 
-            # Если найдено совпадение
-            if match:
-                (best_match_distance, best_match_length) = match
-                output_buffer.append(True)  # Добавляем флаг наличия совпадения (1)
+            output_file = io.BytesIO()  # Без пути результат не сохраняется
+            if output_file_path:
+                try:
+                    output_file = open(output_file_path, 'wb')
+                except IOError:
+                    raise IOError("Не удалось записать файл для сохранения распакованных данных.")
+            with output_file:
+                if vectorized:
+                    output_file.write(result)
+                else:
+                    self.decompress_stream(input_file, output_file, dictionary)
 
-                # Кодируем расстояние и длину совпадения
-                output_buffer.frombytes(bytes([best_match_distance >> 4]))
-                output_buffer.frombytes(bytes([((best_match_distance & 0xf) << 4) | best_match_length]))
-                i += best_match_length  # Перемещаем указатель вперед на длину совпадения
-            else:
-                # Если совпадение не найдено, добавляем символ как есть
-                output_buffer.append(False)  # Добавляем флаг отсутствия совпадения (0)
-                output_buffer.frombytes(bytes([data[i]]))  # Записываем байт символа
-                i += 1  # Переходим к следующему символу
+    def compressobj(self, original_size=UNKNOWN_SIZE, dictionary=b""):
+        """
+        Создает объект для потокового сжатия с текущими настройками.
+        """
+        if dictionary and self.format_version == self.LEGACY_FORMAT:
+            raise ValueError("Словарь доступен только для нового формата.")
+        return StreamCompressor(self, original_size, dictionary)
 
-        output_buffer.fill()  # Заполняем оставшееся пространство нулями
+    def decompressobj(self, dictionary=b""):
+        """
+        Создает объект для потоковой распаковки (формат определяется по заголовку).
+        """
+        return StreamDecompressor(dictionary)
+
+    def compress_stream(self, input_file, output_file, original_size=UNKNOWN_SIZE, dictionary=b""):
+        """
+        Сжатие из файлового объекта в файловый объект порциями по CHUNK_SIZE байт.
+        """
+        compressor = self.compressobj(original_size, dictionary)
+        while True:
+            chunk = input_file.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            output_file.write(compressor.feed(chunk))
+        output_file.write(compressor.flush())
+
+    def decompress_stream(self, input_file, output_file, dictionary=b""):
+        """
+        Распаковка из файлового объекта в файловый объект порциями по CHUNK_SIZE байт.
+        """
+        decompressor = self.decompressobj(dictionary)
+        while True:
+            chunk = input_file.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            output_file.write(decompressor.feed(chunk))
+        output_file.write(decompressor.flush())
+
+    def compress_data(self, data, dictionary=b""):
+        """
+        Сжатие данных в памяти.
+        """
+        compressor = self.compressobj(len(data), dictionary)
+        return compressor.feed(data) + compressor.flush()
+
+    def decompress_data(self, raw_data, dictionary=b"", vectorized=False):
+        """
+        Распаковка сжатых данных в памяти.
 
-        # Запись сжатых данных в файл, если указан путь
-        if output_file_path:
+        Биты читаются по курсору без удаления из начала буфера, результат пишется
+        в заранее выделенный bytearray (размер берется из заголовка, но не больше
+        нескольких длин входа; при нехватке буфер растет), а копии по ссылкам
+        выполняются присваиванием срезов. Размер результата сверяется с заголовком. При vectorized=True токены
+        декодируются все сразу средствами NumPy (decode_tokens_vectorized);
+        потоки с энтропийным кодированием декодируются обычным способом.
+        """
+        # Выбор формата по заголовку: без сигнатуры — старый поток без заголовка
+        if raw_data.startswith(self.MAGIC) and raw_data[4] == self.BLOCK_FORMAT:
+            return b"".join(self.decompress_blocks_data(raw_data, dictionary=dictionary))
+        if raw_data.startswith(self.MAGIC):
+            layout_source, original_size = self.from_header(raw_data)
+            position = layout_source.header_size() * 8  # Курсор чтения в битах
+            dictionary = layout_source.check_dictionary(dictionary)
+        else:
+            layout_source = LZ77Compressor(format_version=self.LEGACY_FORMAT)
+            original_size = self.UNKNOWN_SIZE
+            position = 0
+            dictionary = b""
+        layout = layout_source.token_layout()
+        max_length = layout_source.lookahead_buffer_size - 1
+        known_size = original_size != self.UNKNOWN_SIZE
+        # Каждый токен занимает хотя бы бит и дает не больше max_length байт
+        if known_size and original_size > len(raw_data) * 8 * max_length:
+            raise ValueError("Файл поврежден: размер в заголовке больше возможного.")
+
+        if vectorized and not layout_source.entropy_coding:
+            position, result = decode_tokens_vectorized(raw_data, position, layout, dictionary)
+            if len(raw_data) * 8 - position >= 9:
+                raise ValueError("Файл поврежден: неполный токен в конце.")
+            if known_size and len(result) != original_size:
+                raise ValueError("Файл поврежден: размер не совпадает с заголовком.")
+            return result
+
+        # Словарь стоит перед результатом, чтобы на него могли ссылаться совпадения.
+        # Запас в max_length байт позволяет не проверять границы при каждой копии.
+        # Размер из заголовка не выделяется целиком, если он намного больше входа:
+        # при нехватке места буфер растет сам
+        capacity = min(original_size, len(raw_data) * 4) if known_size else len(raw_data) * 2
+        output_buffer = bytearray(dictionary) + bytearray(capacity + max_length)
+        start = len(dictionary)
+
+        if layout_source.entropy_coding:
+            _, output_position, finished = decode_huffman_frames(raw_data, position >> 3, output_buffer,
+                                                                 start, layout)
+            if not finished:
+                raise ValueError("Файл поврежден: поток оборван.")
+        else:
+            total_bits = len(raw_data) * 8
+            padded = bytes(raw_data) + bytes(8)  # Дополнение, чтобы всегда читать 8 байт
+            position, output_position = decode_tokens(padded, position, total_bits, output_buffer, start, layout)
+            if total_bits - position >= 9:
+                raise ValueError("Файл поврежден: неполный токен в конце.")
+        if known_size and output_position - start != original_size:
+            raise ValueError("Файл поврежден: размер не совпадает с заголовком.")
+
+        return bytes(output_buffer[start:output_position])  # Без словаря и неиспользованного запаса
+
+    def compress_blocks(self, input_file_path, output_file_path, block_size=DEFAULT_BLOCK_SIZE,
+                        workers=None, prime=False, dictionary=b""):
+        """
+        Блочное сжатие: файл делится на блоки по block_size байт, которые
+        сжимаются параллельно в пуле процессов (workers — число процессов).
+
+        При prime=True окно каждого блока заполняется хвостом предыдущего
+        блока: сжатие лучше, но распаковка блоков становится последовательной.
+        Предварительный словарь (dictionary) заполняет окно каждого независимого
+        блока или, при prime=True, только первого.
+        """
+        if self.format_version != self.CONTAINER_FORMAT:
+            raise ValueError("Блочный режим доступен только для нового формата.")
+        if block_size < 1:
+            raise ValueError("Размер блока должен быть положительным.")
+
+        try:
+            input_file = open(input_file_path, 'rb')
+        except IOError:
+            raise IOError("Не удалось открыть файл для чтения.")
+
+        with input_file:
+            original_size = os.fstat(input_file.fileno()).st_size
+            block_count = (original_size + block_size - 1) // block_size
             try:
-                with open(output_file_path, 'wb') as output_file:
-                    output_file.write(output_buffer.tobytes())
+                output_file = open(output_file_path, 'wb')
             except IOError:
                 raise IOError("Не удалось записать файл для сохранения сжатых данных.")
 
-    def decompress(self, input_file_path, output_file_path=None):
+            with output_file:
+                output_file.write(self.header(original_size, self.BLOCK_FORMAT,
+                                              self.FLAG_PRIMED if prime else 0, dictionary))
+                output_file.write(self.BLOCK_TABLE.pack(block_size, block_count))
+                # Таблица блоков записывается после сжатия, пока резервируем место
+                index_position = output_file.tell()
+                output_file.write(bytes(self.BLOCK_ENTRY.size * block_count))
+
+                def jobs():
+                    settings = self.settings()
+                    window = dictionary[-self.window_size:]
+                    for _ in range(block_count):
+                        block = input_file.read(block_size)
+                        yield settings, block, window
+                        if prime:
+                            window = (window + block)[-self.window_size:]
+
+                entries = []
+                offset = output_file.tell()
+                for number, payload in enumerate(run_jobs(compress_block, jobs(), workers)):
+                    original_length = min(block_size, original_size - number * block_size)
+                    entries.append((offset, len(payload), original_length))
+                    output_file.write(payload)
+                    offset += len(payload)
+
+                output_file.seek(index_position)
+                for entry in entries:
+                    output_file.write(self.BLOCK_ENTRY.pack(*entry))
+
+    @classmethod
+    def read_block_index(cls, input_file):
         """
-        Метод для распаковки файла, сжатого с помощью LZ77.
+        Читает заголовок и таблицу блоков; возвращает (компрессор, флаги, записи).
         """
-        data = bitarray(endian='big')  # Битовый массив для хранения входных данных
-        output_buffer = []  # Буфер для распакованных данных
+        header = input_file.read(cls.HEADER.size)
+        if len(header) == cls.HEADER.size and header[7] & cls.FLAG_DICTIONARY:
+            header += input_file.read(cls.DICTIONARY_ID.size)
+        compressor, _ = cls.from_header(header)
+        if header[4] != cls.BLOCK_FORMAT:
+            raise ValueError("Файл сжат не в блочном формате.")
+        flags = header[7]
+        table = input_file.read(cls.BLOCK_TABLE.size)
+        if len(table) < cls.BLOCK_TABLE.size:
+            raise ValueError("Файл поврежден: неполная таблица блоков.")
+        _, block_count = cls.BLOCK_TABLE.unpack(table)
+        index = input_file.read(cls.BLOCK_ENTRY.size * block_count)
+        if len(index) < cls.BLOCK_ENTRY.size * block_count:
+            raise ValueError("Файл поврежден: неполная таблица блоков.")
+        entries = [cls.BLOCK_ENTRY.unpack_from(index, number * cls.BLOCK_ENTRY.size)
+                   for number in range(block_count)]
+        return compressor, flags, entries
 
-        # Чтение сжатых данных из файла
+    def decompress_blocks(self, input_file_path, output_file_path=None, workers=None, dictionary=b""):
+        """
+        Распаковка файла блочного формата; независимые блоки распаковываются параллельно.
+        """
         try:
-            with open(input_file_path, 'rb') as input_file:
-                data.fromfile(input_file)
+            input_file = open(input_file_path, 'rb')
         except IOError:
             raise IOError("Не удалось открыть файл для чтения.")
 
-        # Основной цикл обработки данных
-        while len(data) >= 9:  # Минимум 9 бит для обработки (1 бит флага и 8 бит данных)
+        with input_file:
+            output_file = io.BytesIO()  # Без пути результат не сохраняется
+            if output_file_path:
+                try:
+                    output_file = open(output_file_path, 'wb')
+                except IOError:
+                    raise IOError("Не удалось записать файл для сохранения распакованных данных.")
+            with output_file:
+                for block in self._decode_blocks(input_file, workers, dictionary):
+                    output_file.write(block)
 
-            flag = data.pop(0)  # Извлекаем флаг
+    def decompress_blocks_data(self, raw_data, workers=1, dictionary=b""):
+        """
+        Распаковка блочного формата из памяти; возвращает блоки по порядку.
+        """
+        return self._decode_blocks(io.BytesIO(raw_data), workers, dictionary)
 
-            if not flag:
-                # Если флаг равен 0, читаем 8 бит символа
-                byte = data[:8].tobytes()  # Извлекаем байт данных
-                output_buffer.append(byte)  # Добавляем в буфер вывода
-                del data[:8]  # Удаляем обработанные биты
-            else:
-                # Если флаг равен 1, читаем расстояние и длину
-                byte1 = ord(data[:8].tobytes())  # Первые 8 бит для расстояния
-                byte2 = ord(data[8:16].tobytes())  # Вторые 8 бит для длины
+    def decompress_block(self, input_file_path, block_number, dictionary=b""):
+        """
+        Распаковка одного блока по номеру: читаются только заголовок,
+        таблица блоков и сам блок. Для блоков с заполненным окном (prime)
+        требуются предыдущие блоки, поэтому они распаковываются последовательно.
+        """
+        try:
+            input_file = open(input_file_path, 'rb')
+        except IOError:
+            raise IOError("Не удалось открыть файл для чтения.")
 
-                del data[:16]  # Удаляем обработанные биты
-                distance = (byte1 << 4) | (byte2 >> 4)  # Восстанавливаем расстояние
-                length = (byte2 & 0xf)  # Восстанавливаем длину
+        with input_file:
+            compressor, flags, entries = self.read_block_index(input_file)
+            if not 0 <= block_number < len(entries):
+                raise ValueError(f"Нет блока с номером {block_number}.")
+            layout = compressor.token_layout()
+            window = compressor.check_dictionary(dictionary)
+            first = 0 if flags & self.FLAG_PRIMED else block_number
+            for offset, compressed_size, original_size in entries[first:block_number + 1]:
+                input_file.seek(offset)
+                block = decompress_block(layout, input_file.read(compressed_size), original_size,
+                                         window, compressor.entropy_coding)
+                if flags & self.FLAG_PRIMED:
+                    window = (window + block)[-(1 << compressor.window_bits):]
+            return block
 
-                # Добавляем в выходной буфер данные, используя найденное расстояние и длину
-                for i in range(length):
-                    output_buffer.append(output_buffer[-distance])
+    def _decode_blocks(self, input_file, workers, dictionary=b""):
+        """
+        Генератор распакованных блоков по порядку.
+        """
+        compressor, flags, entries = self.read_block_index(input_file)
+        layout = compressor.token_layout()
+        window = compressor.check_dictionary(dictionary)
 
-        out_data = b''.join(output_buffer)  # Собираем распакованные данные
+        def jobs():
+            for offset, compressed_size, original_size in entries:
+                input_file.seek(offset)
+                yield layout, input_file.read(compressed_size), original_size, window, compressor.entropy_coding
 
-        # Записываем распакованные данные в файл
-        if output_file_path:
-            try:
-                with open(output_file_path, 'wb') as output_file:
-                    output_file.write(out_data)
-            except IOError:
-                raise IOError("Не удалось записать файл для сохранения распакованных данных.")
+        if not flags & self.FLAG_PRIMED:
+            yield from run_jobs(decompress_block, jobs(), workers)
+            return
+
+        # Блоку нужен хвост предыдущего — распаковываем последовательно
+        for layout, payload, original_size, _, entropy_coding in jobs():
+            block = decompress_block(layout, payload, original_size, window, entropy_coding)
+            window = (window + block)[-(1 << compressor.window_bits):]
+            yield block
 
     def find_longest_match(self, data, current_position):
         """
@@ -115,7 +1281,7 @@ class LZ77Compressor:
         best_match_length = -1
 
         # Перебираем возможные подстроки
-        for j in range(current_position + 2, end_of_buffer):
+        for j in range(current_position + self.min_match, end_of_buffer):
             start_index = max(0, current_position - self.window_size)
             substring = data[current_position:j]
 
@@ -133,6 +1299,414 @@ class LZ77Compressor:
             return best_match_distance, best_match_length
         return None
 
+class StreamCompressor:
+    """
+    Потоковое сжатие LZ77: feed(bytes) -> bytes, flush() -> bytes.
+
+    В памяти хранится только окно и буфер предварительного просмотра; позиция
+    кодируется лишь когда за ней доступен полный буфер предварительного просмотра,
+    поэтому результат совпадает со сжатием всего файла целиком.
+    """
+    def __init__(self, compressor, original_size=LZ77Compressor.UNKNOWN_SIZE, dictionary=b"", write_header=True):
+        self.compressor = compressor
+        self.original_size = original_size
+        self.dictionary = dictionary
+        self.finder = compressor.create_match_finder()  # None — полный перебор
+        self.find_match = self.finder.find if self.finder else compressor.find_longest_match
+        # Сколько данных должно быть за кодируемой позицией: буфер предварительного
+        # просмотра, а для суффиксного массива — еще и целый блок индекса
+        self.reserve = compressor.lookahead_buffer_size
+        if isinstance(self.finder, SuffixArrayMatchFinder):
+            self.reserve += self.finder.block_size
+        self.layout = compressor.token_layout()
+        # Запись токенов: как есть или с энтропийным кодированием
+        if compressor.entropy_coding:
+            self.writer = HuffmanTokenWriter(self.layout)
+        else:
+            self.writer = RawTokenWriter(self.layout)
+        # Окно и еще не закодированные данные; словарь сразу попадает в окно
+        self.buffer = bytearray(dictionary[-compressor.window_size:] if dictionary else b"")
+        self.position = len(self.buffer)  # Позиция следующего кодируемого байта в buffer
+        self.header_written = not write_header
+        self.next_match = None  # Ленивый разбор: (позиция, совпадение), найденное заранее
+        # Начало буфера отбрасывается, когда перед позицией накопилось столько лишних байт
+        self.trim_threshold = max(compressor.window_size, compressor.CHUNK_SIZE)
+
+    def feed(self, data):
+        """
+        Добавляет данные и возвращает готовую часть сжатого потока.
+        """
+        self.buffer += data
+        self._encode(len(self.buffer) - self.reserve, final=False)
+        self._trim()
+        return self._output()
+
+    def flush(self):
+        """
+        Кодирует остаток данных и завершает поток.
+        """
+        self._encode(len(self.buffer), final=True)
+        result = self._output()
+        return result + self.writer.flush()
+
+    def _output(self):
+        """
+        Возвращает заголовок (при первом вызове) и накопленные байты.
+        """
+        result = self.writer.take_bytes()
+        if not self.header_written:
+            self.header_written = True
+            if self.compressor.format_version != LZ77Compressor.LEGACY_FORMAT:
+                result = self.compressor.header(self.original_size, dictionary=self.dictionary) + result
+        return result
+
+    def _encode(self, end, final):
+        """
+        Кодирует позиции буфера до end выбранным способом разбора;
+        final — данных больше не будет.
+        """
+        if self.compressor.level == LZ77Compressor.LAZY_PARSE:
+            self._encode_lazy(end)
+        elif self.compressor.level == LZ77Compressor.OPTIMAL_PARSE:
+            self._encode_optimal(end, final)
+        else:
+            self._encode_greedy(end)
+
+    def _encode_greedy(self, end):
+        """
+        Жадный разбор: в каждой позиции берется самое длинное совпадение.
+        """
+        data = self.buffer
+        i = self.position
+        find_match = self.find_match
+        write_literal = self.writer.literal
+        write_match = self.writer.match
+
+        while i < end:
+            # Поиск наилучшего совпадения в окне
+            match = find_match(data, i)
+
+            # Если найдено совпадение
+            if match:
+                (best_match_distance, best_match_length) = match
+                # Флаг 1, расстояние и длина совпадения
+                write_match(best_match_distance, best_match_length)
+                i += best_match_length  # Перемещаем указатель вперед на длину совпадения
+            else:
+                # Если совпадение не найдено, записываем флаг 0 и символ как есть
+                write_literal(data[i])
+                i += 1  # Переходим к следующему символу
+
+        self.position = max(i, self.position)
+
+    def _encode_lazy(self, end):
+        """
+        Ленивый разбор на один шаг: если совпадение со следующей позиции
+        длиннее текущего, текущий байт записывается литералом.
+        """
+        data = self.buffer
+        i = self.position
+        find_match = self.find_match
+        max_length = self.compressor.lookahead_buffer_size - 1
+
+        while i < end:
+            if self.next_match and self.next_match[0] == i:
+                match = self.next_match[1]  # Уже найдено на предыдущем шаге
+            else:
+                match = find_match(data, i)
+            self.next_match = None
+
+            if match and match[1] < max_length:
+                next_match = find_match(data, i + 1)
+                if next_match and next_match[1] > match[1]:
+                    self.next_match = (i + 1, next_match)
+                    match = None
+
+            if match:
+                self.writer.match(*match)
+                i += match[1]
+            else:
+                self.writer.literal(data[i])
+                i += 1
+
+        self.position = max(i, self.position)
+
+    def _encode_optimal(self, end, final):
+        """
+        Ограниченный оптимальный разбор: на участке до OPTIMAL_SEGMENT позиций
+        динамическим программированием выбирается последовательность токенов
+        с минимальным числом бит (литерал — 1 + 8, совпадение — 1 + биты полей;
+        при энтропийном кодировании это лишь оценка).
+        Совпадение любой длины не больше найденной допустимо с тем же расстоянием.
+        Неполный участок кодируется только в конце потока, чтобы границы
+        участков не зависели от размера порций.
+        """
+        data = self.buffer
+        i = self.position
+        find_match = self.find_match
+        distance_bits, length_bits, _, _ = self.layout
+        literal_cost = 9
+        match_cost = 1 + distance_bits + length_bits
+        min_match = self.compressor.min_match
+
+        while i < end:
+            segment_end = min(end, i + LZ77Compressor.OPTIMAL_SEGMENT)
+            if segment_end < i + LZ77Compressor.OPTIMAL_SEGMENT and not final:
+                break  # Ждем данных на полный участок
+            matches = [find_match(data, position) for position in range(i, segment_end)]
+            count = segment_end - i
+
+            # cost[k] — минимальная стоимость от позиции i + k до конца участка;
+            # токены могут выходить за конец участка, там стоимость нулевая
+            cost = [0] * (count + self.compressor.lookahead_buffer_size + 1)
+            choice = [0] * count  # Выбранная длина совпадения, 0 — литерал
+            for k in range(count - 1, -1, -1):
+                best_cost = literal_cost + cost[k + 1]
+                best_length = 0
+                match = matches[k]
+                if match:
+                    # Стоимость совпадения не зависит от длины — ищем минимум остатка
+                    tail_costs = cost[k + min_match:k + match[1] + 1]
+                    best_tail = min(tail_costs)
+                    if match_cost + best_tail < best_cost:
+                        best_cost = match_cost + best_tail
+                        best_length = tail_costs.index(best_tail) + min_match
+                cost[k] = best_cost
+                choice[k] = best_length
+
+            k = 0
+            while k < count:
+                if choice[k]:
+                    self.writer.match(matches[k][0], choice[k])
+                    k += choice[k]
+                else:
+                    self.writer.literal(data[i + k])
+                    k += 1
+            i += k
+
+        self.position = max(i, self.position)
+
+    def _trim(self):
+        """
+        Отбрасывает данные, вышедшие за пределы окна.
+        """
+        drop = self.position - self.compressor.window_size
+        if drop > self.trim_threshold:
+            del self.buffer[:drop]
+            self.position -= drop
+            if self.next_match:
+                self.next_match = (self.next_match[0] - drop, self.next_match[1])
+            if self.finder:
+                self.finder.offset += drop
+
+
+class StreamDecompressor:
+    """
+    Потоковая распаковка LZ77: feed(bytes) -> bytes, flush() -> bytes.
+
+    Формат определяется по первым байтам потока. В памяти хранятся
+    необработанный хвост входа и последние байты результата, на которые
+    могут ссылаться совпадения.
+    """
+    def __init__(self, dictionary=b""):
+        self.dictionary = dictionary  # Предварительный словарь, если файл сжат с ним
+        self.pending = bytearray()  # Еще не декодированные входные байты
+        self.bit_position = 0  # Курсор внутри pending в битах
+        self.layout = None  # Параметры токенов, известны после разбора заголовка
+        self.history = bytearray()  # Последние распакованные байты
+        self.max_distance = 0
+        self.entropy_coding = False
+        self.finished = False  # Получен признак конца потока (энтропийное кодирование)
+        self.original_size = LZ77Compressor.UNKNOWN_SIZE  # Размер из заголовка
+        self.produced = 0  # Сколько байт уже распаковано
+
+    def feed(self, data):
+        """
+        Добавляет сжатые данные и возвращает распакованную часть.
+        """
+        self.pending += data
+        if self.layout is None and not self._read_header(final=False):
+            return b""
+        return self._decode()
+
+    def flush(self):
+        """
+        Декодирует остаток и проверяет, что поток завершен корректно.
+        """
+        if self.layout is None:
+            self._read_header(final=True)
+        result = self._decode()
+        if self.entropy_coding and not self.finished:
+            raise ValueError("Файл поврежден: поток оборван.")
+        if len(self.pending) * 8 - self.bit_position >= 9:
+            raise ValueError("Файл поврежден: неполный токен в конце.")
+        if self.original_size != LZ77Compressor.UNKNOWN_SIZE and self.produced != self.original_size:
+            raise ValueError("Файл поврежден: размер не совпадает с заголовком.")
+        return result
+
+    def _read_header(self, final):
+        """
+        Определяет формат потока; возвращает False, если данных пока мало.
+        """
+        magic = LZ77Compressor.MAGIC
+        header_size = LZ77Compressor.HEADER.size
+        if self.pending[:len(magic)] == magic[:len(self.pending)] and not final:
+            if len(self.pending) < header_size:
+                return False  # Может оказаться заголовком — ждем продолжения
+        if self.pending.startswith(magic):
+            if len(self.pending) > 4 and self.pending[4] == LZ77Compressor.BLOCK_FORMAT:
+                raise ValueError("Блочный формат распаковывается методом decompress_blocks.")
+            if len(self.pending) >= header_size and self.pending[7] & LZ77Compressor.FLAG_DICTIONARY:
+                header_size += LZ77Compressor.DICTIONARY_ID.size
+                if len(self.pending) < header_size and not final:
+                    return False  # Ждем идентификатор словаря
+            layout_source, self.original_size = LZ77Compressor.from_header(bytes(self.pending[:header_size]))
+            del self.pending[:header_size]
+            self.history = bytearray(layout_source.check_dictionary(self.dictionary))
+        else:
+            layout_source = LZ77Compressor(format_version=LZ77Compressor.LEGACY_FORMAT)
+        self.layout = layout_source.token_layout()
+        self.entropy_coding = layout_source.entropy_coding
+        distance_bits, _, distance_bias, _ = self.layout
+        self.max_distance = (1 << distance_bits) - 1 + distance_bias
+        return True
+
+    def _decode(self):
+        """
+        Декодирует все полностью полученные токены.
+        """
+        start = len(self.history)
+        if self.entropy_coding:
+            if self.finished:
+                del self.pending[:]  # Данные после конца потока игнорируются
+                return b""
+            consumed, output_position, self.finished = decode_huffman_frames(
+                self.pending, 0, self.history, start, self.layout)
+            self.bit_position = consumed * 8
+        else:
+            total_bits = len(self.pending) * 8
+            padded = bytes(self.pending) + bytes(8)
+            self.bit_position, output_position = decode_tokens(
+                padded, self.bit_position, total_bits, self.history, start, self.layout)
+
+        result = bytes(self.history[start:output_position])
+        self.produced += len(result)
+        del self.history[output_position:]  # Отбрасываем неиспользованный запас
+        if output_position > 2 * self.max_distance:
+            del self.history[:output_position - self.max_distance]
+
+        # Отбрасываем полностью прочитанные байты входа
+        consumed = self.bit_position >> 3
+        del self.pending[:consumed]
+        self.bit_position -= consumed * 8
+        return result
+
+
+def train_dictionary(samples, size, segment_size=64, dmer_size=8):
+    """
+    Строит предварительный словарь не длиннее size байт по образцам данных.
+
+    Упрощенный алгоритм COVER: образцы режутся на отрезки по segment_size байт
+    (с перекрытием в половину отрезка), и жадно выбираются отрезки с наибольшим
+    суммарным числом повторений их d-грамм (подстрок длины dmer_size),
+    еще не покрытых выбранными отрезками. Самые полезные отрезки ставятся
+    в конец словаря — ближе к сжимаемым данным, где расстояния короче.
+    """
+    samples = [bytes(sample) for sample in samples]
+
+    # Сколько раз каждая d-грамма встречается во всех образцах
+    frequencies = {}
+    for sample in samples:
+        for i in range(len(sample) - dmer_size + 1):
+            dmer = sample[i:i + dmer_size]
+            frequencies[dmer] = frequencies.get(dmer, 0) + 1
+
+    candidates = set()
+    step = max(1, segment_size // 2)
+    for sample in samples:
+        for i in range(0, max(1, len(sample) - dmer_size + 1), step):
+            candidates.add(sample[i:i + segment_size])
+    candidates = sorted(candidates)
+
+    def score(segment):
+        # Учитываются только d-граммы, встречающиеся больше одного раза
+        dmers = {segment[i:i + dmer_size] for i in range(len(segment) - dmer_size + 1)}
+        return sum(count for count in map(frequencies.__getitem__, dmers) if count > 1)
+
+    # Ленивый жадный выбор: оценка отрезка только уменьшается, поэтому
+    # пересчитываем ее, лишь когда отрезок оказывается на вершине кучи
+    heap = [(-score(segment), index) for index, segment in enumerate(candidates)]
+    heapq.heapify(heap)
+    chosen = []
+    total = 0
+    while heap and total < size:
+        _, index = heapq.heappop(heap)
+        segment = candidates[index]
+        current = score(segment)
+        if not current:
+            continue
+        if heap and current < -heap[0][0]:
+            heapq.heappush(heap, (-current, index))
+            continue
+        chosen.append(segment)
+        total += len(segment)
+        for i in range(len(segment) - dmer_size + 1):
+            frequencies[segment[i:i + dmer_size]] = 0  # d-грамма уже есть в словаре
+
+    return b"".join(reversed(chosen))[-size:]
+
+
+def compress_block(settings, block, dictionary=b""):
+    """
+    Сжимает один блок без заголовка (функция верхнего уровня для пула процессов).
+    """
+    compressor = StreamCompressor(LZ77Compressor(**settings), dictionary=dictionary, write_header=False)
+    return compressor.feed(block) + compressor.flush()
+
+
+def decompress_block(layout, payload, original_size, dictionary=b"", entropy_coding=False):
+    """
+    Распаковывает один блок; dictionary — данные перед блоком, если окно было заполнено.
+    """
+    max_length = (1 << layout[1]) - 1 + layout[3]
+    output_buffer = bytearray(dictionary) + bytearray(original_size + max_length)
+    if entropy_coding:
+        position, output_position, finished = decode_huffman_frames(payload, 0, output_buffer,
+                                                                    len(dictionary), layout)
+        corrupted = not finished or position != len(payload)
+    else:
+        total_bits = len(payload) * 8
+        position, output_position = decode_tokens(bytes(payload) + bytes(8), 0, total_bits,
+                                                  output_buffer, len(dictionary), layout)
+        corrupted = total_bits - position >= 9
+    if corrupted or output_position - len(dictionary) != original_size:
+        raise ValueError("Файл поврежден: размер блока не совпадает с таблицей.")
+    return bytes(output_buffer[len(dictionary):output_position])
+
+
+def run_jobs(function, jobs, workers=None):
+    """
+    Выполняет function(*job) для каждого задания в пуле процессов и возвращает
+    результаты по порядку. В работе одновременно не больше 2 * workers заданий,
+    чтобы не читать весь файл в память. При workers=1 пул не создается.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs:
+            yield function(*job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(function, *job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 class LZ77GUI:
     """
     Класс для создания графического интерфейса с использованием Tkinter.
@@ -141,7 +1715,7 @@ class LZ77GUI:
         # Настройка окна
         self.master = master
         self.master.title("LZ77 Компрессия и Декомпрессия")
-        self.master.geometry("400x400")
+        self.master.geometry("400x440")
         self.master.configure(bg="#f0f0f0")
 
         # Заголовок
@@ -149,11 +1723,24 @@ class LZ77GUI:
         self.title_label.pack(pady=20)
 
         # Поле для ввода размера окна
-        self.instruction_label = tk.Label(self.master, text="Введите размер окна (макс 400):", bg="#f0f0f0")
+        self.instruction_label = tk.Label(self.master, bg="#f0f0f0")
         self.instruction_label.pack(pady=5)
         self.window_size_entry = tk.Entry(self.master, font=("Arial", 14), justify="center")
         self.window_size_entry.pack(pady=5)
 
+        # Выбор формата: контейнер с заголовком допускает окно до 1 МиБ и длину совпадения до 258
+        self.container_format = tk.BooleanVar(value=False)
+        self.container_check = tk.Checkbutton(self.master, text="Новый формат (окно до 1048576)",
+                                              variable=self.container_format, bg="#f0f0f0",
+                                              command=self.update_window_label)
+        self.container_check.pack(pady=5)
+        self.update_window_label()
+        # Коды Хаффмана для токенов (только для нового формата)
+        self.entropy_coding = tk.BooleanVar(value=False)
+        self.entropy_check = tk.Checkbutton(self.master, text="Кодирование Хаффмана (новый формат)",
+                                            variable=self.entropy_coding, bg="#f0f0f0")
+        self.entropy_check.pack(pady=5)
+
         # Кнопки для сжатия и распаковки
         self.compress_button = tk.Button(self.master, text="Сжать файл", command=self.compress_file,
                                          font=("Arial", 12), bg="#4CAF50", fg="white", padx=10, pady=5)
@@ -171,14 +1758,29 @@ class LZ77GUI:
         self.status_label = tk.Label(self.master, text="", bg="#f0f0f0", font=("Arial", 10))
         self.status_label.pack(pady=10)
 
+    def max_window_size(self):
+        """
+        Наибольший размер окна для выбранного формата.
+        """
+        if self.container_format.get():
+            return LZ77Compressor.MAX_CONTAINER_WINDOW_SIZE
+        return LZ77Compressor.MAX_WINDOW_SIZE
+
+    def update_window_label(self):
+        """
+        Подпись поля размера окна с ограничением выбранного формата.
+        """
+        self.instruction_label.config(text=f"Введите размер окна (макс {self.max_window_size()}):")
+
     def get_window_size(self):
         """
         Получает и проверяет введенное значение размера окна.
         """
+        max_size = self.max_window_size()
         try:
             size = int(self.window_size_entry.get())
-            if size < 1 or size > 400:
-                raise ValueError("Размер окна должен быть от 1 до 400.")
+            if size < 1 or size > max_size:
+                raise ValueError(f"Размер окна должен быть от 1 до {max_size}.")
             return size
         except ValueError as e:
             messagebox.showerror("Ошибка", str(e))
@@ -196,8 +1798,14 @@ class LZ77GUI:
         if input_file_path:
             output_file_path = filedialog.asksaveasfilename(defaultextension=".lz77", title="Сохраните сжатый файл")
             if output_file_path:
-                compressor = LZ77Compressor(window_size=window_size)
                 try:
+                    if self.container_format.get():
+                        compressor = LZ77Compressor(window_size=window_size,
+                                                    format_version=LZ77Compressor.CONTAINER_FORMAT,
+                                                    entropy_coding=self.entropy_coding.get())
+                    else:
+                        compressor = LZ77Compressor(window_size=window_size,
+                                                    entropy_coding=self.entropy_coding.get())
                     compressor.compress(input_file_path, output_file_path)
                     self.status_label.config(text="Файл успешно сжат!", fg="green")
                 except Exception as e:
@@ -1,9 +1,13 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, StringVar, OptionMenu, Entry
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+import bisect
 import heapq
+import io
 import os
-import pickle
+import struct
+import time
 
 # Узел дерева Хаффмана
 class Node:
@@ -19,7 +23,10 @@ class Node:
 
 # Построение дерева Хаффмана
 def build_huffman_tree(text):
-    frequency = Counter(text)  # Подсчет частоты символов
+    return build_frequency_tree(Counter(text))  # Подсчет частоты символов
+
+# Построение дерева Хаффмана по готовым частотам символов
+def build_frequency_tree(frequency):
     # Создание узлов для каждого символа
     heap = [Node(char, freq) for char, freq in frequency.items()]
     heapq.heapify(heap)  # Преобразование списка в кучу
@@ -35,24 +42,107 @@ def build_huffman_tree(text):
 
     return heap[0]  # Возврат корня дерева
 
-# Генерация кодов Хаффмана
-def generate_huffman_codes(node, current_code="", codes={}):
+# Генерация кодов Хаффмана обходом дерева со стеком (без рекурсии); каждый вызов
+# заполняет новую таблицу. При as_pairs=True код символа — пара
+# (значение, длина в битах) для записи целыми числами, иначе строка '0'/'1'
+def generate_huffman_codes(node, current_code="", codes=None, as_pairs=False):
+    if codes is None:
+        codes = {}
     if node is None:
-        return
-    if node.char is not None:
-        codes[node.char] = current_code  # Присвоение кода символу
-    # Рекурсивный вызов для левого и правого дочерних узлов
-    generate_huffman_codes(node.left, current_code + "0", codes)
-    generate_huffman_codes(node.right, current_code + "1", codes)
+        return codes
+    stack = [(node, int(current_code or "0", 2), len(current_code))]
+    while stack:
+        node, value, length = stack.pop()
+        if node.char is not None:
+            # Присвоение кода символу (bin с ведущей единицей сохраняет ведущие нули кода)
+            codes[node.char] = (value, length) if as_pairs else bin(value | 1 << length)[3:]
+        # Правый узел кладется первым, чтобы левое поддерево обходилось раньше
+        if node.right is not None:
+            stack.append((node.right, value * 2 + 1, length + 1))
+        if node.left is not None:
+            stack.append((node.left, value * 2, length + 1))
     return codes
 
-# Кодирование Хаффмана
-def huffman_encode(text):
-    root = build_huffman_tree(text)  # Построение дерева
-    huffman_codes = generate_huffman_codes(root)  # Генерация кодов
+# Длины кодов символов (глубины листьев дерева)
+def code_lengths(node):
+    return {char: length for char, (_, length) in generate_huffman_codes(node, as_pairs=True).items()}
+
+# Канонические коды по длинам: символы упорядочиваются по (длина, символ),
+# каждый следующий код — предыдущий плюс один, дополненный нулями до своей длины
+def canonical_codes(lengths):
+    codes = {}
+    code, previous = 0, 0
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        code <<= length - previous
+        codes[symbol] = format(code, f'0{length}b') if length else ""
+        code += 1
+        previous = length
+    return codes
+
+# Проверка длин кодов: по ним должен строиться префиксный код (неравенство Крафта)
+def check_lengths(lengths):
+    if len(lengths) == 1:
+        return  # Единственный символ может иметь код любой длины, в том числе пустой
+    if any(length < 1 for length in lengths.values()):
+        raise ValueError("Файл поврежден: нулевая длина кода")
+    longest = max(lengths.values(), default=0)
+    if sum(1 << (longest - length) for length in lengths.values()) > 1 << longest:
+        raise ValueError("Файл поврежден: длины кодов не образуют префиксный код")
+
+# Длины кодов, ограниченные max_length бит (алгоритм package-merge): на каждом
+# из max_length - 1 шагов соседние элементы списка объединяются в пакеты,
+# и пакеты сливаются с исходными символами по весу; длина кода символа —
+# число его вхождений в первые 2n - 2 элемента итогового списка
+def package_merge_lengths(frequency, max_length):
+    symbols = sorted(frequency, key=lambda char: frequency[char])
+    if len(symbols) == 1:
+        return {symbols[0]: 0}
+    if len(symbols) > 1 << max_length:
+        raise ValueError(f"{len(symbols)} символов не кодируются кодами длиной до {max_length} бит")
+    # Элемент — (вес, номер символа) или (вес, пара вложенных элементов)
+    leaves = [(frequency[char], index) for index, char in enumerate(symbols)]
+    current = leaves
+    for _ in range(max_length - 1):
+        packages = [(current[i][0] + current[i + 1][0], (current[i][1], current[i + 1][1]))
+                    for i in range(0, len(current) - 1, 2)]
+        current = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+    lengths = [0] * len(symbols)
+    stack = [item for _, item in current[:2 * len(symbols) - 2]]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            stack.extend(item)
+        else:
+            lengths[item] += 1
+    return dict(zip(symbols, lengths))
+
+# Длины кодов Хаффмана по частотам; если max_length задан и дерево получилось
+# глубже, длины строятся заново с ограничением
+def huffman_lengths(frequency, max_length=None):
+    lengths = code_lengths(build_frequency_tree(frequency))
+    if max_length is not None and max(lengths.values()) > max_length:
+        lengths = package_merge_lengths(frequency, max_length)
+    return lengths
+
+# Средняя длина кода в битах на символ
+def average_code_length(lengths, frequency):
+    return sum(lengths[char] * freq for char, freq in frequency.items()) / sum(frequency.values())
+
+# Сравнение средней длины кода с ограничением и без него
+def length_limit_report(frequency, max_length):
+    unlimited = average_code_length(huffman_lengths(frequency), frequency)
+    limited = average_code_length(huffman_lengths(frequency, max_length), frequency)
+    cost = (limited / unlimited - 1) * 100 if unlimited else 0.0  # Потеря сжатия в процентах
+    return (f"Средняя длина кода (не более {max_length} бит): {limited:.4f} бит\n"
+            f"Без ограничения: {unlimited:.4f} бит (+{cost:.2f}%)")
+
+# Кодирование Хаффмана (max_length — ограничение длины кода)
+def huffman_encode(text, max_length=None):
+    # Канонические коды с теми же длинами: для декодирования достаточно длин
+    huffman_codes = canonical_codes(huffman_lengths(Counter(text), max_length))
     # Кодирование текста с использованием сгенерированных кодов
     encoded_text = ''.join([huffman_codes[char] for char in text])
-    return encoded_text, root  # Возврат закодированного текста и корня дерева
+    return encoded_text, build_code_tree(huffman_codes)  # Возврат закодированного текста и дерева канонических кодов
 
 # Декодирование Хаффмана
 def huffman_decode(encoded_text, root):
@@ -66,50 +156,744 @@ def huffman_decode(encoded_text, root):
             node = root  # Возврат к корню
     return ''.join(decoded_text)  # Возврат декодированного текста
 
-# Шеннон-Фано
+# Шеннон-Фано: символы сортируются по убыванию частоты один раз, дальше
+# делятся только диапазоны индексов. Точка разделения диапазона [start, end) —
+# первый индекс, на котором сумма частот достигает половины суммы диапазона;
+# она ищется двоичным поиском по префиксным суммам. Стек вместо рекурсии
 def shannon_fano_encode(frequency):
-    if len(frequency) == 1:
-        return {list(frequency.keys())[0]: ""}  # Базовый случай
-    # Сортировка частот
+    if not frequency:
+        return {}
     sorted_freq = sorted(frequency.items(), key=lambda x: x[1], reverse=True)
-    total = sum(freq for _, freq in sorted_freq)  # Общая частота
-    split_idx, running_sum = 0, 0
-    # Определение точки разделения
-    for i, (_, freq) in enumerate(sorted_freq):
-        running_sum += freq
-        if running_sum >= total / 2:
-            split_idx = i
-            break
-    left_half = dict(sorted_freq[:split_idx + 1])  # Левая половина
-    right_half = dict(sorted_freq[split_idx + 1:])  # Правая половина
-    left_codes = shannon_fano_encode(left_half)  # Рекурсивный вызов для левой половины
-    right_codes = shannon_fano_encode(right_half)  # Рекурсивный вызов для правой половины
-    # Добавление префиксов
-    for char in left_codes:
-        left_codes[char] = '0' + left_codes[char]
-    for char in right_codes:
-        right_codes[char] = '1' + right_codes[char]
-    left_codes.update(right_codes)  # Объединение кодов
-    return left_codes
+    prefix = [0]  # prefix[i] — сумма частот первых i символов
+    for _, freq in sorted_freq:
+        prefix.append(prefix[-1] + freq)
+    codes = {}
+    stack = [(0, len(sorted_freq), "")]
+    while stack:
+        start, end, code = stack.pop()
+        if end - start == 1:
+            codes[sorted_freq[start][0]] = code
+            continue
+        half = prefix[start] + (prefix[end] - prefix[start]) / 2
+        split = bisect.bisect_left(prefix, half, start + 1, end - 1)  # Конец левой половины
+        stack.append((split, end, code + '1'))
+        stack.append((start, split, code + '0'))
+    return codes
 
 # Кодирование Шеннон-Фано
 def shannon_fano(text):
     frequency = Counter(text)  # Подсчет частоты символов
     codes = shannon_fano_encode(frequency)  # Генерация кодов
+    codes = canonical_codes({char: len(code) for char, code in codes.items()})  # Канонический вид
     encoded_text = ''.join([codes[char] for char in text])  # Кодирование текста
     return encoded_text, codes  # Возврат закодированного текста и кодов
 
-# Декодирование Шеннон-Фано
+# Упаковка строки бит '0'/'1' в байты; возвращаются байты и число бит дополнения
+def pack_bit_string(bits):
+    padding = -len(bits) % 8
+    return int(bits + "0" * padding or "0", 2).to_bytes((len(bits) + padding) // 8, 'big'), padding
+
+# Декодирование Шеннон-Фано: строка бит упаковывается в байты и декодируется
+# по таблицам, построенным из кодов, — тем же декодером, что и контейнеры
 def shannon_fano_decode(encoded_text, codes):
-    reversed_codes = {v: k for k, v in codes.items()}  # Реверсирование кодов
-    current_code = ""
-    decoded_text = []  # Список для хранения декодированных символов
-    for bit in encoded_text:
-        current_code += bit  # Построение текущего кода
-        if current_code in reversed_codes:  # Если код найден
-            decoded_text.append(reversed_codes[current_code])  # Добавление символа
-            current_code = ""  # Сброс текущего кода
-    return ''.join(decoded_text)  # Возврат декодированного текста
+    payload, padding = pack_bit_string(encoded_text)
+    return decode_packed_table(payload, padding, codes)
+
+# Заголовок текстового формата: пары "номер символа:длина кода" через пробел
+def format_lengths_line(lengths):
+    return ' '.join(f"{ord(char)}:{length}" for char, length in sorted(lengths.items()))
+
+# Разбор заголовка текстового формата
+def parse_lengths_line(line):
+    lengths = {}
+    for pair in line.split():
+        char, _, length = pair.partition(':')
+        lengths[chr(int(char))] = int(length)
+    check_lengths(lengths)
+    return lengths
+
+# Двоичный контейнер для канонических префиксных кодов (Хаффмана и Шеннона-Фано):
+# сигнатура, число бит дополнения в последнем байте, число символов в таблице,
+# длина сообщения в символах; затем таблица длин (байт символа, длина кода)
+# и упакованные биты сообщения. Сами коды восстанавливаются по длинам
+CONTAINER_MAGIC = b"PFX2"
+CONTAINER_HEADER = struct.Struct(">4sBHQ")
+CHUNK_SIZE = 1 << 16  # Сколько символов кодируется за один шаг
+PRIMARY_BITS = 12  # Ширина индекса первичной таблицы декодирования
+DECODERS = ("table", "tree")  # Табличный декодер и обход дерева по одному биту
+
+# Коды в виде пар (значение, длина в битах) для записи целыми числами
+def code_pairs(codes):
+    return {symbol: (int(code or "0", 2), len(code)) for symbol, code in codes.items()}
+
+# Таблицы для упаковки байтов через NumPy: строка таблицы битов — биты кода
+# байта, выровненные влево, строка таблицы масок отмечает, какие из них — код.
+# NumPy импортируется здесь: без него байты пишутся через write_symbols
+def numpy_code_tables(codes):
+    import numpy as np
+    width = max([len(code) for code in codes.values()] + [1])
+    bit_table = np.zeros((256, width), dtype=np.uint8)
+    mask_table = np.zeros((256, width), dtype=bool)
+    for symbol, code in codes.items():
+        bit_table[symbol, :len(code)] = [bit == '1' for bit in code]
+        mask_table[symbol, :len(code)] = True
+    return bit_table, mask_table
+
+# Запись бит в файл: биты накапливаются в целом числе, целые байты сразу
+# сбрасываются в файл; между вызовами в памяти остается меньше байта
+class BitWriter:
+    def __init__(self, file):
+        self.file = file  # Файл (или BytesIO), открытый на запись в двоичном режиме
+        self.accumulator = 0  # Биты, не вошедшие в целые байты
+        self.bits = 0  # Число этих бит
+
+    # Сброс целых байтов из аккумулятора в файл
+    def drain(self):
+        whole, rest = self.bits >> 3, self.bits & 7
+        if whole:
+            self.file.write((self.accumulator >> rest).to_bytes(whole, 'big'))
+            self.accumulator &= (1 << rest) - 1
+            self.bits = rest
+
+    # Запись строки бит '0'/'1'
+    def write(self, bits):
+        if bits:
+            self.accumulator = self.accumulator << len(bits) | int(bits, 2)
+            self.bits += len(bits)
+            self.drain()
+
+    # Запись кодов символов по таблице пар (значение, длина): каждые 64 бита
+    # аккумулятора выводятся восемью байтами
+    def write_symbols(self, data, pairs):
+        accumulator, bits = self.accumulator, self.bits
+        output = bytearray()
+        for symbol in data:
+            value, length = pairs[symbol]
+            accumulator = accumulator << length | value
+            bits += length
+            while bits >= 64:
+                bits -= 64
+                output += (accumulator >> bits).to_bytes(8, 'big')
+                accumulator &= (1 << bits) - 1
+        self.file.write(output)
+        self.accumulator, self.bits = accumulator, bits
+        self.drain()
+
+    # Запись кодов байтов через NumPy: строки таблиц выбираются по байтам
+    # через take (быстрее индексирования списком), лишние столбцы отсекаются масками,
+    # и биты упаковываются в байты одним вызовом packbits
+    def write_bytes(self, data, tables):
+        import numpy as np
+        bit_table, mask_table = tables
+        symbols = np.frombuffer(data, dtype=np.uint8)
+        bits = np.take(bit_table, symbols, axis=0)[np.take(mask_table, symbols, axis=0)]
+        if self.bits:
+            prefix = np.unpackbits(np.array([self.accumulator << (8 - self.bits)], dtype=np.uint8))
+            bits = np.concatenate((prefix[:self.bits], bits))
+        whole = len(bits) & ~7
+        self.file.write(np.packbits(bits[:whole]).tobytes())
+        self.bits = len(bits) - whole
+        self.accumulator = int(np.packbits(bits[whole:])[0]) >> (8 - self.bits) if self.bits else 0
+
+    def flush(self):
+        # Последний байт дополняется нулями; возвращается число бит дополнения
+        padding = -self.bits % 8
+        if self.bits:
+            self.file.write(bytes([self.accumulator << padding]))
+        self.accumulator, self.bits = 0, 0
+        return padding
+
+# Способ записи байтов: через NumPy, а без него — через таблицу пар
+def byte_writer(writer, codes):
+    try:
+        return writer.write_bytes, numpy_code_tables(codes)
+    except ImportError:
+        return writer.write_symbols, code_pairs(codes)
+
+# Упаковка кодов символов в байты по порциям: байты упаковываются через NumPy,
+# остальные последовательности символов (и байты без NumPy) — через
+# целочисленный аккумулятор
+def pack_bits(data, codes):
+    output = io.BytesIO()
+    writer = BitWriter(output)
+    write, tables = byte_writer(writer, codes) if isinstance(data, (bytes, bytearray)) \
+        else (writer.write_symbols, code_pairs(codes))
+    for start in range(0, len(data), CHUNK_SIZE):
+        write(data[start:start + CHUNK_SIZE], tables)
+    padding = writer.flush()
+    return output.getvalue(), padding
+
+# Заголовок двоичного контейнера с таблицей длин кодов
+def container_header(lengths, count, padding):
+    header = bytearray(CONTAINER_HEADER.pack(CONTAINER_MAGIC, padding, len(lengths), count))
+    for symbol, length in sorted(lengths.items(), key=lambda item: (item[1], item[0])):
+        header += bytes([symbol, length])
+    return bytes(header)
+
+# Запись двоичного контейнера: сообщение кодируется каноническими кодами по длинам
+def write_container(data, lengths):
+    payload, padding = pack_bits(data, canonical_codes(lengths))
+    return container_header(lengths, len(data), padding) + payload
+
+# Чтение файла порциями по CHUNK_SIZE байт
+def read_chunks(path):
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            yield chunk
+
+# Подсчет частот байтов через bincount: в Counter попадают только встреченные байты.
+# Без NumPy байты считаются самим Counter в том же порядке — по значению байта
+def count_bytes(data):
+    try:
+        import numpy as np
+    except ImportError:
+        return Counter(dict(sorted(Counter(data).items())))
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    return Counter({symbol: int(counts[symbol]) for symbol in np.flatnonzero(counts).tolist()})
+
+# Первый проход потокового кодирования: подсчет частот байтов файла по порциям
+def count_file(path):
+    frequency = Counter()
+    for chunk in read_chunks(path):
+        frequency.update(count_bytes(chunk))
+    return frequency
+
+# Второй проход: файл кодируется по порциям, упакованные байты сразу пишутся
+# в выходной файл. Число бит дополнения известно заранее из частот и длин,
+# поэтому заголовок пишется первым. В памяти — одна порция и таблица кодов
+def write_container_file(input_path, output_path, frequency, lengths):
+    total_bits = sum(freq * lengths[symbol] for symbol, freq in frequency.items())
+    with open(output_path, 'wb') as output:
+        output.write(container_header(lengths, sum(frequency.values()), -total_bits % 8))
+        writer = BitWriter(output)
+        write, tables = byte_writer(writer, canonical_codes(lengths))
+        for chunk in read_chunks(input_path):
+            write(chunk, tables)
+        writer.flush()
+
+# Чтение двоичного контейнера: коды, длина сообщения, дополнение и упакованные биты
+def read_container(container):
+    if len(container) < CONTAINER_HEADER.size or not container.startswith(CONTAINER_MAGIC):
+        raise ValueError("Файл не является двоичным контейнером")
+    _, padding, table_size, count = CONTAINER_HEADER.unpack_from(container)
+    position = CONTAINER_HEADER.size + 2 * table_size
+    if position > len(container):
+        raise ValueError("Файл поврежден: неполная таблица кодов")
+    table = container[CONTAINER_HEADER.size:position]
+    lengths = dict(zip(table[::2], table[1::2]))
+    if len(lengths) != table_size:
+        raise ValueError("Файл поврежден: символ повторяется в таблице кодов")
+    check_lengths(lengths)
+    return canonical_codes(lengths), count, padding, container[position:]
+
+# Восстановление дерева по таблице кодов
+def build_code_tree(codes):
+    root = Node(None, 0)
+    for symbol, code in codes.items():
+        node = root
+        for bit in code:
+            if bit == '0':
+                node.left = node.left or Node(None, 0)
+                node = node.left
+            else:
+                node.right = node.right or Node(None, 0)
+                node = node.right
+        node.char = symbol
+    return root
+
+# Декодирование упакованных бит обходом дерева
+def decode_packed(payload, padding, codes, count):
+    root = build_code_tree(codes)
+    if root.char is not None:
+        return bytes([root.char]) * count  # Единственный символ с пустым кодом
+    decoded = bytearray()
+    node = root
+    total_bits = len(payload) * 8 - padding
+    for start in range(0, len(payload), CHUNK_SIZE):
+        chunk = payload[start:start + CHUNK_SIZE]
+        bits = format(int.from_bytes(chunk, 'big'), f'0{len(chunk) * 8}b')
+        for bit in bits[:total_bits - start * 8]:
+            node = node.left if bit == '0' else node.right
+            if node is None:
+                raise ValueError("Файл поврежден: неизвестный код")
+            if node.char is not None:
+                decoded.append(node.char)
+                node = root
+    if len(decoded) != count:
+        raise ValueError("Файл поврежден: длина сообщения не совпадает с заголовком")
+    return bytes(decoded)
+
+# Таблица декодирования для кодов codes (список пар (символ, код)): индекс —
+# следующие bits бит, элемент — (байты или строка символа, длина кода); для кодов
+# длиннее bits — (вложенная таблица, -ширина ее индекса); (b"", 0) — такого кода нет
+def build_table(codes, bits):
+    table = [(b"", 0)] * (1 << bits)
+    longer = {}
+    for symbol, code in codes:
+        if len(code) <= bits:
+            span = 1 << (bits - len(code))
+            start = int(code, 2) * span
+            unit = symbol if isinstance(symbol, str) else bytes([symbol])
+            table[start:start + span] = [(unit, len(code))] * span
+        else:
+            longer.setdefault(code[:bits], []).append((symbol, code[bits:]))
+    for prefix, rest in longer.items():
+        sub_bits = min(max(len(code) for _, code in rest), bits)
+        table[int(prefix, 2)] = (build_table(rest, sub_bits), -sub_bits)
+    return table
+
+# Первичная таблица с несколькими символами на элемент: за одно обращение
+# декодируются все коды, целиком поместившиеся в primary_bits бит
+def build_decode_tables(codes, primary_bits=PRIMARY_BITS):
+    base = build_table(sorted(codes.items()), primary_bits)
+    mask = (1 << primary_bits) - 1
+    primary = []
+    for index, (symbols, used) in enumerate(base):
+        if used > 0:
+            while True:
+                # Следующий код — в оставшихся used..primary_bits битах индекса
+                next_symbols, next_used = base[(index << used) & mask]
+                if next_used <= 0 or used + next_used > primary_bits:
+                    break
+                symbols += next_symbols
+                used += next_used
+        primary.append((symbols, used))
+    return primary
+
+# Табличное декодирование упакованных бит. Символы кодов — байты (результат —
+# bytes) или символы текста (результат — str); count=None — длина сообщения
+# неизвестна, декодируются ровно total_bits бит без дополнения
+def decode_packed_table(payload, padding, codes, count=None, primary_bits=PRIMARY_BITS):
+    text = any(isinstance(symbol, str) for symbol in codes)
+    if len(codes) == 1 and not next(iter(codes.values())):
+        # Единственный символ с пустым кодом; без длины сообщения их число неизвестно
+        symbol = next(iter(codes))
+        return (symbol if text else bytes([symbol])) * (count or 0)
+    primary = build_decode_tables(codes, primary_bits)
+    mask = (1 << primary_bits) - 1
+    padded = bytes(payload) + bytes(16)  # Чтобы всегда можно было прочитать 16 байт
+    total_bits = len(payload) * 8 - padding
+    limit = total_bits if count is None else count  # Каждый код — хотя бы один бит
+    decoded = [] if text else bytearray()
+    position = 0
+    while len(decoded) < limit and position + primary_bits <= total_bits:
+        byte_position = position >> 3
+        window = int.from_bytes(padded[byte_position:byte_position + 16], 'big')
+        available = 128 - (position & 7)
+        # Индекс таблицы не должен заходить за конец сообщения, иначе элемент
+        # с несколькими символами захватит биты дополнения
+        floor = max(primary_bits, byte_position * 8 + 128 + primary_bits - total_bits)
+        # Несколько обращений к таблице на одно чтение 128-битного окна
+        while available >= floor:
+            symbols, used = primary[(window >> (available - primary_bits)) & mask]
+            if used <= 0:
+                break
+            decoded += symbols
+            available -= used
+        position = byte_position * 8 + 128 - available
+        if available >= floor:
+            # Длинный код: спускаемся по вложенным таблицам
+            table, bits = primary, primary_bits
+            while True:
+                byte_position = position >> 3
+                window = int.from_bytes(padded[byte_position:byte_position + 16], 'big')
+                symbols, used = table[(window >> (128 - (position & 7) - bits)) & ((1 << bits) - 1)]
+                if not used:
+                    raise ValueError("Файл поврежден: неизвестный код")
+                if used > 0:
+                    break
+                position += bits
+                table, bits = symbols, -used
+            if position + used > total_bits:
+                raise ValueError("Файл поврежден: неполный код")
+            decoded += symbols
+            position += used
+    if len(decoded) < limit and position < total_bits:
+        # Хвост короче primary_bits бит — обход дерева кодов по одному биту
+        root = build_code_tree(codes)
+        node = root
+        offset = position & 7
+        bits = format(int.from_bytes(padded[position >> 3:(position >> 3) + 16], 'big'), '0128b')
+        for bit in bits[offset:offset + total_bits - position]:
+            node = node.left if bit == '0' else node.right
+            if node is None:
+                raise ValueError("Файл поврежден: неизвестный код")
+            if node.char is not None:
+                decoded.append(node.char)
+                node = root
+        if count is None and node is not root:
+            raise ValueError("Файл поврежден: неполный код")
+    if count is not None and len(decoded) < count:
+        raise ValueError("Файл поврежден: длина сообщения не совпадает с заголовком")
+    return ''.join(decoded[:limit]) if text else bytes(decoded[:limit])
+
+# Кодирование Хаффмана байтов в двоичный контейнер (max_length — ограничение длины кода)
+def huffman_encode_bytes(data, max_length=None):
+    if not data:
+        return write_container(data, {}), None
+    lengths = huffman_lengths(count_bytes(data), max_length)
+    return write_container(data, lengths), build_code_tree(canonical_codes(lengths))
+
+# Потоковое кодирование Хаффмана файла в двоичный контейнер (два прохода);
+# возвращаются частоты байтов и длины кодов
+def huffman_encode_file(input_path, output_path, max_length=None):
+    frequency = count_file(input_path)
+    lengths = huffman_lengths(frequency, max_length) if frequency else {}
+    write_container_file(input_path, output_path, frequency, lengths)
+    return frequency, lengths
+
+# Потоковое кодирование Шеннон-Фано файла в двоичный контейнер (два прохода)
+def shannon_fano_file(input_path, output_path):
+    frequency = count_file(input_path)
+    codes = shannon_fano_encode(frequency) if frequency else {}
+    lengths = {symbol: len(code) for symbol, code in codes.items()}
+    write_container_file(input_path, output_path, frequency, lengths)
+    return frequency, lengths
+
+# Кодирование Шеннон-Фано байтов в двоичный контейнер
+def shannon_fano_bytes(data):
+    codes = shannon_fano_encode(count_bytes(data)) if data else {}
+    lengths = {symbol: len(code) for symbol, code in codes.items()}
+    return write_container(data, lengths), canonical_codes(lengths)
+
+# Декодирование двоичного контейнера (Хаффмана или Шеннон-Фано) табличным
+# декодером или обходом дерева
+def decode_container(container, decoder="table"):
+    if decoder not in DECODERS:
+        raise ValueError(f"Неизвестный декодер: {decoder}")
+    codes, count, padding, payload = read_container(container)
+    if not count:
+        return b""
+    if decoder == "table":
+        return decode_packed_table(payload, padding, codes, count)
+    return decode_packed(payload, padding, codes, count)
+
+# Поток адаптивного кода Хаффмана: сигнатура, биты кодов, последний байт —
+# число бит дополнения. Длина сообщения заранее не нужна: кодирование в один проход
+ADAPTIVE_MAGIC = b"AHF1"
+
+# Дерево адаптивного кода Хаффмана (алгоритм FGK): дерево перестраивается после
+# каждого символа, поэтому подсчет частот заранее не нужен. Узлы упорядочены
+# по неубыванию веса (свойство соседства); новый байт передается кодом узла NYT
+# и восемью битами самого байта. Узлов не больше 513 — память ограничена
+class AdaptiveHuffmanTree:
+    def __init__(self):
+        self.root = 0  # Корень всегда узел 0: в начале это NYT
+        self.nyt = 0  # Узел для еще не встречавшихся байтов
+        self.weight = [0]  # Вес узла
+        self.parent = [-1]  # Родитель узла (-1 у корня)
+        self.children = [None]  # [левый, правый] у внутреннего узла
+        self.symbol = [None]  # Байт листа
+        self.order = [0]  # Узлы по возрастанию номера (и веса)
+        self.rank = [0]  # Номер узла в order
+        self.leaves = {}  # Байт -> лист
+
+    # Код узла — путь от корня
+    def code(self, node):
+        bits = []
+        while node != self.root:
+            parent = self.parent[node]
+            bits.append('1' if self.children[parent][1] == node else '0')
+            node = parent
+        return ''.join(reversed(bits))
+
+    # Код байта в текущем состоянии дерева
+    def encode(self, symbol):
+        leaf = self.leaves.get(symbol)
+        if leaf is None:
+            return self.code(self.nyt) + format(symbol, '08b')
+        return self.code(leaf)
+
+    # Новый узел нулевого веса
+    def add_node(self, parent, symbol):
+        self.weight.append(0)
+        self.parent.append(parent)
+        self.children.append(None)
+        self.symbol.append(symbol)
+        self.rank.append(0)
+        return len(self.weight) - 1
+
+    # Обмен местами двух поддеревьев
+    def swap(self, first, second):
+        first_parent, second_parent = self.parent[first], self.parent[second]
+        if first_parent == second_parent:
+            self.children[first_parent].reverse()
+        else:
+            self.children[first_parent][self.children[first_parent].index(first)] = second
+            self.children[second_parent][self.children[second_parent].index(second)] = first
+            self.parent[first], self.parent[second] = second_parent, first_parent
+        self.rank[first], self.rank[second] = self.rank[second], self.rank[first]
+        self.order[self.rank[first]], self.order[self.rank[second]] = first, second
+
+    # Обновление дерева после кодирования или декодирования байта
+    def update(self, symbol):
+        node = self.leaves.get(symbol)
+        if node is None:
+            # NYT становится внутренним узлом: слева новый NYT, справа лист байта
+            old_nyt = self.nyt
+            self.nyt = self.add_node(old_nyt, None)
+            node = self.add_node(old_nyt, symbol)
+            self.children[old_nyt] = [self.nyt, node]
+            self.leaves[symbol] = node
+            self.order[0:0] = [self.nyt, node]
+            for index, item in enumerate(self.order):
+                self.rank[item] = index
+        weight, order, rank, parent = self.weight, self.order, self.rank, self.parent
+        last = len(order) - 1
+        while node != -1:
+            # Узел меняется местами со старшим по номеру узлом того же веса (кроме
+            # родителя: с предком поддерево обменять нельзя, тогда берется следующий)
+            index = rank[node]
+            while index < last and weight[order[index + 1]] == weight[node]:
+                index += 1
+            if order[index] == parent[node]:
+                index -= 1
+            if order[index] != node:
+                self.swap(node, order[index])
+            weight[node] += 1
+            node = parent[node]
+
+# Адаптивное кодирование потока байтов (файл, канал) за один проход
+def adaptive_encode_stream(source, output):
+    output.write(ADAPTIVE_MAGIC)
+    tree = AdaptiveHuffmanTree()
+    writer = BitWriter(output)
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+        bits = []
+        for symbol in chunk:
+            bits.append(tree.encode(symbol))
+            tree.update(symbol)
+        writer.write(''.join(bits))
+    output.write(bytes([writer.flush()]))  # Последний байт — число бит дополнения
+
+# Биты потока адаптивного кода: два последних прочитанных байта придерживаются,
+# пока не станет ясно, что поток закончился (последний байт — дополнение)
+def adaptive_stream_bits(source):
+    pending = b""
+    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+        data = pending + chunk
+        body, pending = data[:-2], data[-2:]
+        if body:
+            yield from format(int.from_bytes(body, 'big'), f'0{len(body) * 8}b')
+    if not pending or pending[-1] > 7 or (pending[-1] and len(pending) < 2):
+        raise ValueError("Файл поврежден: неверный байт дополнения")
+    if len(pending) == 2:
+        yield from format(pending[0], '08b')[:8 - pending[-1]]
+
+# Адаптивное декодирование потока: декодер перестраивает дерево так же, как кодер
+def adaptive_decode_stream(source, output):
+    if source.read(len(ADAPTIVE_MAGIC)) != ADAPTIVE_MAGIC:
+        raise ValueError("Файл не является потоком адаптивного кода")
+    tree = AdaptiveHuffmanTree()
+    decoded = bytearray()
+    node, raw = None, 1  # node = None: читаются 8 бит нового байта (raw с маркерной единицей)
+    for bit in adaptive_stream_bits(source):
+        if node is None:
+            raw = raw * 2 + (bit == '1')
+            if raw < 256:
+                continue
+            symbol = raw - 256
+        else:
+            node = tree.children[node][bit == '1']
+            if node == tree.nyt:
+                node, raw = None, 1
+                continue
+            symbol = tree.symbol[node]
+            if symbol is None:
+                continue
+        decoded.append(symbol)
+        tree.update(symbol)
+        node = tree.root
+        if len(decoded) >= CHUNK_SIZE:
+            output.write(decoded)
+            decoded.clear()
+    if (node != tree.root) if tree.leaves else raw != 1:
+        raise ValueError("Файл поврежден: поток оборван посреди кода")
+    output.write(decoded)
+
+# Адаптивное кодирование байтов в памяти
+def adaptive_encode_bytes(data):
+    output = io.BytesIO()
+    adaptive_encode_stream(io.BytesIO(data), output)
+    return output.getvalue()
+
+# Адаптивное декодирование байтов в памяти
+def adaptive_decode_bytes(encoded):
+    output = io.BytesIO()
+    adaptive_decode_stream(io.BytesIO(encoded), output)
+    return output.getvalue()
+
+# Сравнение скорости статического (два прохода) и адаптивного (один проход)
+# кодирования Хаффмана на одних и тех же данных
+def adaptive_benchmark(data):
+    coders = (("Статический", lambda message: huffman_encode_bytes(message)[0], decode_container),
+              ("Адаптивный", adaptive_encode_bytes, adaptive_decode_bytes))
+    lines = []
+    for name, encode, decode in coders:
+        start = time.perf_counter()
+        encoded = encode(data)
+        middle = time.perf_counter()
+        if decode(encoded) != data:
+            raise ValueError(f"{name}: декодированные данные не совпадают с исходными")
+        end = time.perf_counter()
+        megabytes = len(data) / 1e6
+        lines.append(f"{name}: {len(data)} -> {len(encoded)} байт, "
+                     f"кодирование {megabytes / (middle - start):.2f} МБ/с, "
+                     f"декодирование {megabytes / (end - middle):.2f} МБ/с")
+    return "\n".join(lines)
+
+# Блочный контейнер Хаффмана: заголовок (сигнатура, длина исходного файла,
+# размер блока, число блоков, размер общей таблицы), общая таблица длин кодов,
+# таблица блоков (смещение, размер, исходный размер, число бит дополнения,
+# есть ли своя таблица) и сами блоки. Блоки кодируются и декодируются
+# независимо, поэтому обрабатываются параллельно
+BLOCK_MAGIC = b"PFB1"
+BLOCK_HEADER = struct.Struct(">4sQIIH")
+BLOCK_ENTRY = struct.Struct(">QIIBB")
+BLOCK_SIZE = 1 << 20  # Размер блока по умолчанию
+
+# Чтение файла блоками по block_size байт
+def read_blocks(path, block_size):
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            yield block
+
+# Выполнение function(*job) для каждого задания в пуле процессов; результаты
+# возвращаются по порядку. В работе одновременно не больше 2 * workers заданий,
+# чтобы не читать весь файл в память. При workers=1 пул не создается
+def run_jobs(function, jobs, workers=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs:
+            yield function(*job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(function, *job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+# Подсчет частот байтов блока (выполняется в пуле процессов)
+def count_block(block):
+    return count_bytes(block)
+
+# Кодирование блока (выполняется в пуле процессов). Своя таблица длин
+# записывается в блок, только если с ней блок вместе с таблицей короче,
+# чем с общими кодами; возвращаются (байты блока, дополнение, своя ли таблица)
+def encode_block(block, global_lengths, max_length=None, local_tables=True):
+    lengths = global_lengths
+    table = b""
+    if local_tables:
+        frequency = count_bytes(block)
+        local_lengths = huffman_lengths(frequency, max_length)
+        local_bits = sum(freq * local_lengths[symbol] for symbol, freq in frequency.items())
+        global_bits = sum(freq * global_lengths[symbol] for symbol, freq in frequency.items())
+        if local_bits + 8 * (2 + 2 * len(local_lengths)) < global_bits:
+            lengths = local_lengths
+            table = struct.pack(">H", len(lengths)) + bytes(
+                value for symbol, length in sorted(lengths.items()) for value in (symbol, length))
+    payload, padding = pack_bits(block, canonical_codes(lengths))
+    return table + payload, padding, bool(table)
+
+# Декодирование блока (выполняется в пуле процессов)
+def decode_block(payload, padding, has_table, count, global_lengths):
+    lengths = global_lengths
+    if has_table:
+        if len(payload) < 2:
+            raise ValueError("Файл поврежден: неполная таблица блока")
+        table_size = struct.unpack_from(">H", payload)[0]
+        table = payload[2:2 + 2 * table_size]
+        if len(table) < 2 * table_size:
+            raise ValueError("Файл поврежден: неполная таблица блока")
+        lengths = dict(zip(table[::2], table[1::2]))
+        check_lengths(lengths)
+        payload = payload[2 + 2 * table_size:]
+    if not count:
+        return b""
+    return decode_packed_table(payload, padding, canonical_codes(lengths), count)
+
+# Блочное кодирование Хаффмана: первый проход параллельно считает частоты
+# блоков и строит общую таблицу кодов, второй параллельно кодирует блоки.
+# local_tables — разрешить блокам свои таблицы, если распределение байтов
+# в блоке заметно отличается от общего. Возвращается число блоков со своей таблицей
+def huffman_encode_blocks(input_path, output_path, block_size=BLOCK_SIZE, workers=None,
+                          max_length=None, local_tables=True):
+    if block_size < 1:
+        raise ValueError("Размер блока должен быть положительным")
+    frequency = Counter()
+    for counts in run_jobs(count_block, ((chunk,) for chunk in read_blocks(input_path, block_size)), workers):
+        frequency.update(counts)
+    global_lengths = huffman_lengths(frequency, max_length) if frequency else {}
+    original_size = sum(frequency.values())
+    block_count = (original_size + block_size - 1) // block_size
+
+    with open(output_path, 'wb') as output:
+        output.write(BLOCK_HEADER.pack(BLOCK_MAGIC, original_size, block_size, block_count, len(global_lengths)))
+        output.write(bytes(value for symbol, length in sorted(global_lengths.items()) for value in (symbol, length)))
+        # Таблица блоков записывается после кодирования, пока резервируем место
+        index_position = output.tell()
+        output.write(bytes(BLOCK_ENTRY.size * block_count))
+
+        jobs = ((block, global_lengths, max_length, local_tables)
+                for block in read_blocks(input_path, block_size))
+        entries = []
+        offset = output.tell()
+        for number, (payload, padding, has_table) in enumerate(run_jobs(encode_block, jobs, workers)):
+            original_length = min(block_size, original_size - number * block_size)
+            entries.append((offset, len(payload), original_length, padding, has_table))
+            output.write(payload)
+            offset += len(payload)
+
+        output.seek(index_position)
+        for entry in entries:
+            output.write(BLOCK_ENTRY.pack(*entry))
+    return sum(entry[4] for entry in entries)
+
+# Чтение заголовка блочного контейнера: общая таблица длин и таблица блоков
+def read_block_index(file):
+    header = file.read(BLOCK_HEADER.size)
+    if len(header) < BLOCK_HEADER.size or not header.startswith(BLOCK_MAGIC):
+        raise ValueError("Файл не является блочным контейнером")
+    _, original_size, _, block_count, table_size = BLOCK_HEADER.unpack(header)
+    table = file.read(2 * table_size)
+    index = file.read(BLOCK_ENTRY.size * block_count)
+    if len(table) < 2 * table_size or len(index) < BLOCK_ENTRY.size * block_count:
+        raise ValueError("Файл поврежден: неполная таблица блоков")
+    global_lengths = dict(zip(table[::2], table[1::2]))
+    check_lengths(global_lengths)
+    entries = [BLOCK_ENTRY.unpack_from(index, number * BLOCK_ENTRY.size) for number in range(block_count)]
+    if sum(entry[2] for entry in entries) != original_size:
+        raise ValueError("Файл поврежден: размеры блоков не совпадают с заголовком")
+    return global_lengths, entries
+
+# Блочное декодирование: блоки независимы и декодируются параллельно
+def huffman_decode_blocks(input_path, output_path, workers=None):
+    with open(input_path, 'rb') as file:
+        global_lengths, entries = read_block_index(file)
+
+        def jobs():
+            for offset, size, count, padding, has_table in entries:
+                file.seek(offset)
+                yield file.read(size), padding, has_table, count, global_lengths
+
+        with open(output_path, 'wb') as output:
+            for block in run_jobs(decode_block, jobs(), workers):
+                output.write(block)
+
+# Декодирование одного блока по номеру: читаются только заголовок,
+# таблицы и сам блок
+def huffman_decode_block(input_path, number):
+    with open(input_path, 'rb') as file:
+        global_lengths, entries = read_block_index(file)
+        if not 0 <= number < len(entries):
+            raise ValueError(f"Нет блока с номером {number}")
+        offset, size, count, padding, has_table = entries[number]
+        file.seek(offset)
+        return decode_block(file.read(size), padding, has_table, count, global_lengths)
 
 # GUI приложение
 class EncoderApp:
@@ -120,10 +904,10 @@ class EncoderApp:
 
         # Переменные для хранения значений
         self.filename_var = StringVar()
-        self.tree_filename_var = StringVar()
-        self.codes_filename_var = StringVar()
         self.selected_algorithm = StringVar(value="Хаффман")  # Алгоритм по умолчанию
         self.selected_action = StringVar(value="Кодировать")  # Действие по умолчанию
+        self.max_length_var = StringVar()  # Ограничение длины кода Хаффмана (пусто — без ограничения)
+        self.text_format = tk.BooleanVar(value=False)  # Текстовый формат '0'/'1' — только для отладки
 
         # Создание элементов интерфейса
         self.create_widgets()
@@ -135,30 +919,25 @@ class EncoderApp:
         file_entry.pack(pady=5, anchor='w', padx=10)
         tk.Button(self.root, text="Обзор", command=self.choose_file).pack(pady=(0, 10), anchor='w', padx=10)
 
-        # Поле для ввода пути к файлу дерева и кнопка выбора
-        tk.Label(self.root, text="Выберите или введите путь к файлу дерева Хаффмана", anchor='w').pack(pady=(10, 0),
-                                                                                                       anchor='w', padx=10)
-        tree_entry = Entry(self.root, textvariable=self.tree_filename_var, width=50)
-        tree_entry.pack(pady=5, anchor='w', padx=10)
-        tk.Button(self.root, text="Обзор", command=self.choose_tree_file).pack(pady=(0, 10), anchor='w', padx=10)
-
-        # Поле для ввода пути к файлу кодов Шеннон-Фано и кнопка выбора
-        tk.Label(self.root, text="Выберите или введите путь к файлу кодов Шеннон-Фано", anchor='w').pack(pady=(10, 0),
-                                                                                                         anchor='w', padx=10)
-        codes_entry = Entry(self.root, textvariable=self.codes_filename_var, width=50)
-        codes_entry.pack(pady=5, anchor='w', padx=10)
-        tk.Button(self.root, text="Обзор", command=self.choose_codes_file).pack(pady=(0, 10), anchor='w', padx=10)
-
         # Выбор алгоритма через выпадающий список
         tk.Label(self.root, text="Выберите алгоритм", anchor='w').pack(pady=(10, 0), anchor='w', padx=10)
-        algorithm_options = ["Хаффман", "Шеннон-Фано"]
+        algorithm_options = ["Хаффман", "Шеннон-Фано", "Адаптивный Хаффман", "Блочный Хаффман"]
         OptionMenu(self.root, self.selected_algorithm, *algorithm_options).pack(pady=(0, 10), anchor='w', padx=10)
 
+        # Ограничение длины кода Хаффмана
+        tk.Label(self.root, text="Максимальная длина кода Хаффмана (пусто — без ограничения)",
+                 anchor='w').pack(pady=(10, 0), anchor='w', padx=10)
+        Entry(self.root, textvariable=self.max_length_var, width=10).pack(pady=(0, 10), anchor='w', padx=10)
+
         # Выбор действия через выпадающий список
         tk.Label(self.root, text="Выберите действие", anchor='w').pack(pady=(10, 0), anchor='w', padx=10)
         action_options = ["Кодировать", "Декодировать"]
         OptionMenu(self.root, self.selected_action, *action_options).pack(pady=(0, 10), anchor='w', padx=10)
 
+        # Текстовый формат: строка длин кодов и биты '0'/'1' (для отладки)
+        tk.Checkbutton(self.root, text="Текстовый формат '0'/'1' (отладка)",
+                       variable=self.text_format).pack(pady=(0, 10), anchor='w', padx=10)
+
         # Кнопка выполнения по центру внизу
         tk.Button(self.root, text="Выполнить", command=self.perform_action, borderwidth=2, highlightbackground="blue",
                   highlightcolor="blue").pack(ipadx=270, ipady=20, side='bottom', anchor='center')
@@ -166,31 +945,31 @@ class EncoderApp:
     # Метод для выбора файла
     def choose_file(self):
         self.filename_var.set(filedialog.askopenfilename(
-            filetypes=[("Text files", "*.txt"), ("Encoded files", "*.huffman *.shannon-fano *.encoded")]))  # Открытие диалогового окна для выбора файла
-
-    # Метод для выбора файла дерева Хаффмана
-    def choose_tree_file(self):
-        self.tree_filename_var.set(filedialog.askopenfilename(filetypes=[("Huffman Tree Files", "*.pkl")]))  # Открытие диалогового окна для выбора файла дерева
-
-    # Метод для выбора файла кодов Шеннон-Фано
-    def choose_codes_file(self):
-        self.codes_filename_var.set(filedialog.askopenfilename(filetypes=[("Shannon-Fano Code Files", "*.pkl")]))  # Открытие диалогового окна для выбора файла кодов
+            filetypes=[("Text files", "*.txt"), ("Encoded files", "*.huffman *.shannon-fano *.ahuffman *.bhuffman *.encoded")]))  # Открытие диалогового окна для выбора файла
 
     # Метод для выполнения действия (кодирование/декодирование)
     def perform_action(self):
         filename = self.filename_var.get()  # Получение пути к файлу
-        tree_filename = self.tree_filename_var.get()  # Получение пути к файлу дерева
-        codes_filename = self.codes_filename_var.get()  # Получение пути к файлу кодов
 
         if not filename:
             messagebox.showwarning("Ошибка", "Пожалуйста, выберите или введите путь к файлу")  # Проверка выбора файла
             return
 
-        with open(filename, 'r', encoding='utf-8') as file:
-            text = file.read()  # Чтение содержимого файла
-
         algorithm = self.selected_algorithm.get()  # Получение выбранного алгоритма
         action = self.selected_action.get()  # Получение выбранного действия
+        try:
+            max_length = int(self.max_length_var.get()) if self.max_length_var.get().strip() else None
+        except ValueError:
+            messagebox.showwarning("Ошибка", "Максимальная длина кода должна быть целым числом")
+            return
+
+        # Адаптивный и блочный коды работают только с двоичными файлами
+        if not self.text_format.get() or algorithm in ("Адаптивный Хаффман", "Блочный Хаффман"):
+            self.perform_binary_action(filename, algorithm, action, max_length)
+            return
+
+        with open(filename, 'r', encoding='utf-8') as file:
+            text = file.read()  # Чтение содержимого файла
 
         # Получаем путь к файлу и его расширение
         base_name, file_extension = os.path.splitext(filename)  # Разделение имени файла и расширения
@@ -198,60 +977,105 @@ class EncoderApp:
         if action == "Кодировать":
             if algorithm == "Хаффман":
                 # Кодирование текста с использованием алгоритма Хаффмана
-                encoded_text, tree = huffman_encode(text)
+                try:
+                    encoded_text, tree = huffman_encode(text, max_length)
+                except ValueError as e:
+                    messagebox.showerror("Ошибка", str(e))
+                    return
+                lengths = code_lengths(tree)
                 output_file = f"{base_name}_huffman_encoded{file_extension}"  # Формирование имени выходного файла
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(encoded_text)  # Запись закодированного текста в файл
-                # Сохранение дерева Хаффмана в файл
-                tree_file_name = f"{base_name}_huffman_tree.pkl"
-                with open(tree_file_name, 'wb') as tree_file:
-                    pickle.dump(tree, tree_file)  # Сериализация дерева в файл
-                messagebox.showinfo("Успех",
-                                    f"Файл закодирован как {output_file}\nДерево Хаффмана сохранено как {tree_file_name}")
-
             elif algorithm == "Шеннон-Фано":
                 # Кодирование текста с использованием алгоритма Шеннон-Фано
                 encoded_text, codes = shannon_fano(text)
+                lengths = {char: len(code) for char, code in codes.items()}
                 output_file = f"{base_name}_shannon-fano_encoded{file_extension}"  # Формирование имени выходного файла
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    f.write(encoded_text)  # Запись закодированного текста в файл
-                # Сохранение кодов Шеннон-Фано в файл
-                codes_file_name = f"{base_name}_shannon-fano_codes.pkl"
-                with open(codes_file_name, 'wb') as codes_file:
-                    pickle.dump(codes, codes_file)  # Сериализация кодов в файл
-                messagebox.showinfo("Успех",
-                                    f"Файл закодирован как {output_file}\nКоды Шеннон-Фано сохранены как {codes_file_name}")
+            with open(output_file, 'w', encoding='utf-8') as f:
+                # Первая строка — длины канонических кодов, вторая — закодированный текст
+                f.write(format_lengths_line(lengths) + "\n" + encoded_text)
+            message = f"Файл закодирован как {output_file}"
+            if algorithm == "Хаффман" and max_length is not None and text:
+                message += "\n" + length_limit_report(Counter(text), max_length)
+            messagebox.showinfo("Успех", message)
 
         elif action == "Декодировать":
+            header, _, encoded_text = text.partition("\n")
+            try:
+                codes = canonical_codes(parse_lengths_line(header))  # Коды восстанавливаются по длинам
+            except ValueError:
+                messagebox.showerror("Ошибка", "Файл поврежден: неверная строка длин кодов")  # Обработка ошибки
+                return
             if algorithm == "Хаффман":
-                if not tree_filename:
-                    messagebox.showwarning("Ошибка", "Пожалуйста, выберите файл дерева Хаффмана")  # Проверка выбора файла дерева
-                    return
+                decoded_text = huffman_decode(encoded_text, build_code_tree(codes))  # Декодирование обходом дерева
+                output_file = f"{base_name}_huffman_decoded{file_extension}"  # Формирование имени выходного файла
+            elif algorithm == "Шеннон-Фано":
                 try:
-                    with open(tree_filename, 'rb') as tree_file:
-                        tree = pickle.load(tree_file)  # Десериализация дерева из файла
-                    decoded_text = huffman_decode(text, tree)  # Декодирование текста
-                    output_file = f"{base_name}_huffman_decoded{file_extension}"  # Формирование имени выходного файла
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(decoded_text)  # Запись декодированного текста в файл
-                    messagebox.showinfo("Успех", f"Файл декодирован как {output_file}")
-                except FileNotFoundError:
-                    messagebox.showerror("Ошибка", f"Файл дерева Хаффмана не найден: {tree_filename}")  # Обработка ошибки
+                    decoded_text = shannon_fano_decode(encoded_text, codes)  # Табличное декодирование
+                except ValueError as e:
+                    messagebox.showerror("Ошибка", str(e))
+                    return
+                output_file = f"{base_name}_shannon-fano_decoded{file_extension}"  # Формирование имени выходного файла
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(decoded_text)  # Запись декодированного текста в файл
+            messagebox.showinfo("Успех", f"Файл декодирован как {output_file}")
 
-            elif algorithm == "Шеннон-Фано":
-                if not codes_filename:
-                    messagebox.showwarning("Ошибка", "Пожалуйста, выберите файл кодов Шеннон-Фано")  # Проверка выбора файла кодов
+    # Метод для кодирования/декодирования в двоичном контейнере (таблица кодов хранится в самом файле)
+    def perform_binary_action(self, filename, algorithm, action, max_length=None):
+        if action == "Кодировать":
+            # Потоковое кодирование: файл целиком в память не читается
+            if algorithm == "Хаффман":
+                output_file = f"{filename}.huffman"
+                try:
+                    frequency, _ = huffman_encode_file(filename, output_file, max_length)
+                except ValueError as e:
+                    messagebox.showerror("Ошибка", str(e))
                     return
+            elif algorithm == "Шеннон-Фано":
+                output_file = f"{filename}.shannon-fano"
+                frequency, _ = shannon_fano_file(filename, output_file)
+            elif algorithm == "Блочный Хаффман":
+                # Блоки кодируются параллельно в пуле процессов
+                output_file = f"{filename}.bhuffman"
                 try:
-                    with open(codes_filename, 'rb') as codes_file:
-                        codes = pickle.load(codes_file)  # Десериализация кодов из файла
-                    decoded_text = shannon_fano_decode(text, codes)  # Декодирование текста
-                    output_file = f"{base_name}_shannon-fano_decoded{file_extension}"  # Формирование имени выходного файла
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        f.write(decoded_text)  # Запись декодированного текста в файл
-                    messagebox.showinfo("Успех", f"Файл декодирован как {output_file}")
-                except FileNotFoundError:
-                    messagebox.showerror("Ошибка", f"Файл кодов Шеннон-Фано не найден: {codes_filename}")  # Обработка ошибки
+                    huffman_encode_blocks(filename, output_file, max_length=max_length)
+                except ValueError as e:
+                    messagebox.showerror("Ошибка", str(e))
+                    return
+                frequency = None
+            else:
+                # Адаптивный код: один проход, подходит и для потоков без известной длины
+                output_file = f"{filename}.ahuffman"
+                with open(filename, 'rb') as source, open(output_file, 'wb') as output:
+                    adaptive_encode_stream(source, output)
+                frequency = None
+            message = (f"Файл закодирован как {output_file}\n"
+                       f"Размер: {os.path.getsize(filename)} -> {os.path.getsize(output_file)} байт")
+            if algorithm == "Хаффман" and max_length is not None and frequency:
+                message += "\n" + length_limit_report(frequency, max_length)
+            messagebox.showinfo("Успех", message)
+
+        elif action == "Декодировать":
+            # Исходное имя — без расширения контейнера (file.txt.huffman -> file_decoded.txt)
+            base_name, file_extension = os.path.splitext(os.path.splitext(filename)[0])
+            output_file = f"{base_name}_decoded{file_extension}"
+            with open(filename, 'rb') as file:
+                magic = file.read(len(ADAPTIVE_MAGIC))  # Вид файла определяется по сигнатуре
+            try:
+                if magic == ADAPTIVE_MAGIC:
+                    # Поток адаптивного кода декодируется по порциям
+                    with open(filename, 'rb') as source, open(output_file, 'wb') as output:
+                        adaptive_decode_stream(source, output)
+                elif magic == BLOCK_MAGIC:
+                    huffman_decode_blocks(filename, output_file)  # Блоки декодируются параллельно
+                else:
+                    with open(filename, 'rb') as file:
+                        data = file.read()  # Файл читается как байты: подходит для любых файлов
+                    decoded = decode_container(data)  # Алгоритм не важен: таблица кодов в контейнере
+                    with open(output_file, 'wb') as f:
+                        f.write(decoded)  # Запись декодированных байтов в файл
+            except ValueError as e:
+                messagebox.showerror("Ошибка", str(e))
+                return
+            messagebox.showinfo("Успех", f"Файл декодирован как {output_file}")
 
 # Запуск приложения
 if __name__ == "__main__":